@@ -15,11 +15,41 @@ import argparse
 import logging
 import subprocess
 import re
+import json
+import time
+import hashlib
+import hmac
+import asyncio
+import threading
+import mmap
+import struct
+import unicodedata
+from array import array
+from bisect import bisect_left
+from io import BytesIO
+from collections import Counter, OrderedDict
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import secrets
 import string
 from pathlib import Path
+try:
+    import resource
+except ImportError:
+    resource = None
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
 from fontTools.ttLib import TTFont, TTCollection
-from fontTools.subset import main as subset_main
+from fontTools.ttLib.tables._n_a_m_e import NameRecord
+from fontTools import subset
+from fontTools import unicodedata as font_unicodedata
+from fontTools.varLib import instancer
 
 from rich.console import Console
 from rich.table import Table
@@ -28,23 +58,84 @@ from rich.panel import Panel
 from rich import box
 
 MKVMERGE_BIN = r"D:\Program Files\MKVToolNixPortable_84.0_azo\MKVToolNixPortable\App\ProgramFiles64\mkvmerge.exe"
+MKVPROPEDIT_BIN = r"D:\Program Files\MKVToolNixPortable_84.0_azo\MKVToolNixPortable\App\ProgramFiles64\mkvpropedit.exe"
+MKVEXTRACT_BIN = r"D:\Program Files\MKVToolNixPortable_84.0_azo\MKVToolNixPortable\App\ProgramFiles64\mkvextract.exe"
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 IGNORE_FONTS = {'default', 'arial', 'sans-serif'}
 SMART_SUFFIXES = ['_gbk', '_gb2312', '_big5', '_jis', '_kr']
+FONT_EXTENSIONS = {'.ttf', '.otf', '.ttc'}
+FONT_INDEX_VERSION = 3
+# Legacy Windows CJK name records, usually double-byte text padded into 16-bit units.
+LEGACY_NAME_CODECS = {2: 'cp932', 3: 'gbk', 4: 'cp950', 5: 'cp949', 6: 'johab'}
+LOOSE_KEY_RE = re.compile(r'[\s\-_\u2010\u2011\u2013\u2014\u30fb\u00b7]+')
+SUGGESTION_LIMIT = 3
+SUGGESTION_MIN_SCORE = 0.3
+GLYPH_REPORT_LIMIT = 20
+# Same order as fontTools getBestCmap.
+CMAP_PREFERENCE = [(3, 10), (0, 6), (0, 4), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0)]
+# fontTools subset options per --subset-profile. Every profile except "full" also prunes
+# GSUB/GPOS to the OpenType scripts of the subset text.
+SUBSET_PROFILES = {
+    "minimal": {"name_IDs": [0, 1, 2, 4, 6], "hinting": False},
+    "balanced": {"layout_features": ["*"]},
+    "full": {"layout_features": ["*"], "name_IDs": ["*"]},
+}
+DEFAULT_SUBSET_PROFILE = "full"
+# Not a weight: "regular" means the face's own default, e.g. the wght axis default.
+REGULAR_FONT_WEIGHT = 0
+BOLD_FONT_WEIGHT = 700
+SUBSET_CACHE_VERSION = 2
+SOURCE_FONT_CACHE_BYTES = 256 * 1024 * 1024
+PIPELINE_QUEUE_SIZE = 2
+ASS_CODEC_IDS = {"S_TEXT/ASS", "S_TEXT/SSA"}
+FONT_MIME_TYPES = {
+    "application/x-truetype-font", "application/vnd.ms-opentype", "application/font-sfnt",
+    "application/x-font-ttf", "application/x-font-otf", "font/ttf", "font/otf", "font/sfnt", "font/collection",
+}
+FONTMAP_RE = re.compile(r'^; FontMap: (.+?) -> (.+)$')
+ASS_FN_RE = re.compile(r"\\fn([^\\}]+)")
+ASS_REWRITE_THREADS = 4
+MANIFEST_NAME = "mux_manifest.json"
+OUTPUT_DIR_NAME = "output"
+TEMP_DIR_NAME = "temp_fonts_mux"
+OVERWRITE_TEMP_SUFFIX = ".part"
+BACKUP_SUFFIX = ".bak"
+FICLONE = 0x40049409
+MANIFEST_VERSION = 1
+MANIFEST_OPTIONS = ("force_match", "disable_subset", "no_reuse_attachments", "overwrite", "attachments_only", "batch_plan", "subset_profile", "stable_names")
+SFNT_VERSIONS = {b'\x00\x01\x00\x00', b'OTTO', b'true'}
+PROFILE_TRACE_NAME = "mux_trace.json"
+WATCH_FONT_POLL_SECONDS = 30
+NAME_KEY_FILE = "name.key"
+NAME_ALPHABET = string.ascii_letters + string.digits
 
 console = Console()
 file_logger = None
+profiler = None
+stable_namer = None
 
-def setup_file_logger(save_log_path):
+def setup_file_logger(save_log_path, mode='w'):
     global file_logger
     if save_log_path:
         file_logger = logging.getLogger("FileLogger")
         file_logger.setLevel(logging.INFO)
         file_logger.handlers.clear()
-        fh = logging.FileHandler(save_log_path, mode='w', encoding='utf-8')
+        if mode == 'w':
+            open(save_log_path, 'w').close()
+        # Append mode keeps lines from worker processes sharing this file intact.
+        fh = logging.FileHandler(save_log_path, mode='a', encoding='utf-8')
         fh.setFormatter(logging.Formatter(LOG_FORMAT))
         file_logger.addHandler(fh)
 
+def current_log_path():
+    if file_logger and file_logger.handlers:
+        return file_logger.handlers[0].baseFilename
+    return None
+
+def init_worker(save_log_path):
+    # Worker processes append to the parent's log instead of truncating it.
+    setup_file_logger(save_log_path, mode='a')
+
 def log_to_file(msg, level="info"):
     if file_logger:
         if level == "warning":
@@ -54,16 +145,226 @@ def log_to_file(msg, level="info"):
         else:
             file_logger.info(msg)
 
+def peak_rss_bytes():
+    # High-water mark of this process over its whole lifetime; it never goes down.
+    if resource:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        psapi = ctypes.windll.psapi
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+        if psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    return None
+
+def children_cpu_time():
+    # Only counts child processes that have been waited for (always 0 on Windows).
+    t = os.times()
+    return t.children_user + t.children_system
+
+def cpu_timed_call(func, *args):
+    # Runs func on a pool worker or helper thread and reports the CPU it used there, plus
+    # the RSS high-water mark of the process it ran in (the worker's, on a pool).
+    start = time.thread_time()
+    result = func(*args)
+    return result, time.thread_time() - start, peak_rss_bytes()
+
+class ProfileStage:
+    # One timed stage. Stages that run as coroutines on the event loop pass a lane and
+    # only count the CPU reported through add_cpu() and by finished child processes.
+    def __init__(self, name, episode=None, lane=None):
+        self.name = name
+        self.episode = episode
+        self.lane = lane
+        self.cpu = 0.0
+        self.bytes_written = 0
+        self.worker_peak_rss = None
+        self.active = profiler is not None
+
+    def __enter__(self):
+        if self.active:
+            self.lane = self.lane or threading.current_thread().name
+            self._children = children_cpu_time()
+            self._thread = time.thread_time() if self.lane == threading.current_thread().name else None
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.active:
+            self.wall = time.perf_counter() - self.start
+            self.cpu += children_cpu_time() - self._children
+            if self._thread is not None:
+                self.cpu += time.thread_time() - self._thread
+            # Not a per-stage figure: the main process's high-water mark when the stage ended.
+            self.process_max_rss = peak_rss_bytes()
+            profiler.record(self)
+        return False
+
+    def add_cpu(self, seconds):
+        self.cpu += seconds
+
+    def add_worker_rss(self, peak):
+        if peak is not None:
+            self.worker_peak_rss = max(self.worker_peak_rss or 0, peak)
+
+    def add_output(self, path):
+        if self.active and path:
+            try:
+                self.bytes_written += os.path.getsize(path)
+            except OSError:
+                pass
+
+class RunProfiler:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.stages = []
+        self.lanes = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage):
+        with self.lock:
+            self.lanes.setdefault(stage.lane, len(self.lanes) + 1)
+            self.stages.append(stage)
+        log_to_file(f"[Profile] {stage.name} {stage.episode or '-'}: wall={stage.wall:.3f}s cpu={stage.cpu:.3f}s "
+                    f"written={stage.bytes_written}")
+
+    def write_trace(self, path):
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "mkvFontmux"}}]
+        for lane, tid in self.lanes.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": lane}})
+        for stage in self.stages:
+            events.append({
+                "name": stage.name, "cat": "stage", "ph": "X", "pid": pid, "tid": self.lanes[stage.lane],
+                "ts": round((stage.start - self.origin) * 1e6), "dur": round(stage.wall * 1e6),
+                "args": {"episode": stage.episode, "cpu_ms": round(stage.cpu * 1000, 3),
+                         "process_max_rss": stage.process_max_rss, "worker_peak_rss": stage.worker_peak_rss,
+                         "bytes_written": stage.bytes_written},
+            })
+        Path(path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding='utf-8')
+
+    def print_summary(self):
+        by_stage = {}
+        by_episode = {}
+        for stage in self.stages:
+            by_stage.setdefault(stage.name, []).append(stage)
+            by_episode.setdefault(stage.episode or "(batch)", []).append(stage)
+
+        def mb(n):
+            return f"{n / 1024 / 1024:.1f}" if n is not None else "---"
+
+        table = Table(title="Profile by Stage", box=box.ROUNDED)
+        table.add_column("Stage", style="cyan")
+        table.add_column("Calls", justify="right")
+        table.add_column("Wall (s)", justify="right")
+        table.add_column("CPU (s)", justify="right")
+        table.add_column("Process Max RSS (MB)", justify="right", style="dim")
+        table.add_column("Worker Peak RSS (MB)", justify="right", style="dim")
+        table.add_column("Written (MB)", justify="right", style="magenta")
+        for name, stages in by_stage.items():
+            rss = [s.process_max_rss for s in stages if s.process_max_rss is not None]
+            worker_rss = [s.worker_peak_rss for s in stages if s.worker_peak_rss is not None]
+            table.add_row(name, str(len(stages)), f"{sum(s.wall for s in stages):.3f}", f"{sum(s.cpu for s in stages):.3f}",
+                          mb(max(rss) if rss else None), mb(max(worker_rss) if worker_rss else None),
+                          mb(sum(s.bytes_written for s in stages)))
+        console.print(table)
+        console.print("[dim]Process max RSS is the main process's high-water mark at the end of the stage, "
+                      "not memory used by the stage; worker peak RSS comes from the subset pool processes.[/]")
+
+        table = Table(title="Profile by Episode", box=box.ROUNDED)
+        table.add_column("Episode", style="cyan")
+        table.add_column("Wall (s)", justify="right")
+        table.add_column("CPU (s)", justify="right")
+        table.add_column("Written (MB)", justify="right", style="magenta")
+        table.add_column("Slowest Stage", style="dim")
+        for episode, stages in by_episode.items():
+            slowest = max(stages, key=lambda s: s.wall)
+            table.add_row(episode, f"{sum(s.wall for s in stages):.3f}", f"{sum(s.cpu for s in stages):.3f}",
+                          mb(sum(s.bytes_written for s in stages)), f"{slowest.name} ({slowest.wall:.3f}s)")
+        console.print(table)
+
 def normalize_font_key(name):
     return name.lower().strip()
 
+def loose_font_key(name):
+    # Width-, case-, whitespace- and hyphen-insensitive form used for fallback matching.
+    return LOOSE_KEY_RE.sub('', unicodedata.normalize('NFKC', name).casefold())
+
+def name_trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def decode_name_record(record):
+    if record.platformID == 3 and record.platEncID in LEGACY_NAME_CODECS and isinstance(record.string, bytes):
+        return record.string.replace(b'\x00', b'').decode(LEGACY_NAME_CODECS[record.platEncID], errors='replace')
+    try:
+        return record.toUnicode()
+    except UnicodeDecodeError:
+        return record.toUnicode(errors='replace')
+
 def generate_random_name(length=10):
-    alphabet = string.ascii_letters + string.digits
-    return "".join(secrets.choice(alphabet) for _ in range(length))
+    return "".join(secrets.choice(NAME_ALPHABET) for _ in range(length))
+
+def load_name_key(key_path):
+    # Created on first use and kept private, so names cannot be traced back to known fonts.
+    key_path = Path(key_path)
+    try:
+        return key_path.read_bytes()
+    except FileNotFoundError:
+        pass
+    key_path.parent.mkdir(parents=True, exist_ok=True)
+    key = secrets.token_bytes(32)
+    try:
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return key_path.read_bytes()
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    log_to_file(f"[System] Created font name key: {key_path}")
+    return key
+
+class StableNamer:
+    # Obfuscated family names as an HMAC of (source font, face, charset). Identical inputs
+    # always get the same name; a different input that lands on a taken name is rehashed.
+    def __init__(self, key):
+        self.key = key
+        self.owners = {}
 
-def obfuscate_font_names(font_path, new_family_name):
+    def name_for(self, font_path, font_index, chars, length=10):
+        identity = f"{file_digest(font_path)}\0{font_index}\0{''.join(sorted(chars))}"
+        attempt = 0
+        while True:
+            message = identity if attempt == 0 else f"{identity}\0{attempt}"
+            value = int.from_bytes(hmac.new(self.key, message.encode('utf-8', 'surrogatepass'), hashlib.sha256).digest(), 'big')
+            chars_out = []
+            for _ in range(length):
+                value, digit = divmod(value, len(NAME_ALPHABET))
+                chars_out.append(NAME_ALPHABET[digit])
+            name = "".join(chars_out)
+            if self.owners.setdefault(name, identity) == identity:
+                return name
+            log_to_file(f"[Warning] Stable name collision on {name} for {font_path}. Rehashing.", "warning")
+            attempt += 1
+
+def obfuscated_name(font_path, font_index, chars):
+    return stable_namer.name_for(font_path, font_index, chars) if stable_namer else generate_random_name()
+
+def obfuscate_font_names(tt, new_family_name):
     try:
-        tt = TTFont(font_path)
         name_table = tt['name']
         targets = set()
         for record in name_table.names:
@@ -73,19 +374,432 @@ def obfuscate_font_names(font_path, new_family_name):
             name_table.setName(new_family_name, 1, platform_id, plat_enc_id, lang_id)
             name_table.setName(new_family_name, 4, platform_id, plat_enc_id, lang_id)
             name_table.setName(new_family_name, 6, platform_id, plat_enc_id, lang_id)
-        tt.save(font_path)
-        tt.close()
         return True
     except Exception as e:
-        log_to_file(f"[Warning] Failed to update name table: {font_path} ({e})", "warning")
+        log_to_file(f"[Warning] Failed to update name table: {new_family_name} ({e})", "warning")
         return False
 
+def get_cache_dir():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(base) / "mkvFontmux"
+
+def read_sfnt_names(file_path):
+    # Reads name IDs 1/4/6 straight from the sfnt table directory.
+    # Returns None when the file needs the full fontTools reader.
+    try:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:4] == b'ttcf':
+                num_fonts = struct.unpack_from('>I', mm, 8)[0]
+                offsets = struct.unpack_from(f'>{num_fonts}I', mm, 12)
+            elif mm[:4] in SFNT_VERSIONS:
+                offsets = (0,)
+            else:
+                return None
+            records = []
+            for index, offset in enumerate(offsets):
+                if mm[offset:offset + 4] not in SFNT_VERSIONS:
+                    return None
+                num_tables = struct.unpack_from('>H', mm, offset + 4)[0]
+                name_table = None
+                for i in range(num_tables):
+                    tag, _, table_offset, table_length = struct.unpack_from('>4sLLL', mm, offset + 12 + i * 16)
+                    if tag == b'name':
+                        name_table = mm[table_offset:table_offset + table_length]
+                        break
+                if name_table is None:
+                    log_to_file(f"[Warning] Failed to register font: {file_path}", "warning")
+                    continue
+                _, count, string_offset = struct.unpack_from('>HHH', name_table, 0)
+                string_data = name_table[string_offset:]
+                for i in range(count):
+                    if 6 + (i + 1) * 12 > len(name_table):
+                        break
+                    platform_id, plat_enc_id, lang_id, name_id, length, str_offset = \
+                        struct.unpack_from('>6H', name_table, 6 + i * 12)
+                    if name_id not in (1, 4, 6) or str_offset + length > len(string_data):
+                        continue
+                    record = NameRecord()
+                    record.nameID, record.platformID = name_id, platform_id
+                    record.platEncID, record.langID = plat_enc_id, lang_id
+                    record.string = string_data[str_offset:str_offset + length]
+                    name = decode_name_record(record)
+                    if name:
+                        records.append((index, name))
+            return records
+    except (OSError, ValueError, struct.error):
+        return None
+
+def read_font_names(file_path):
+    records = read_sfnt_names(file_path)
+    if records is None:
+        log_to_file(f"[Font] Falling back to fontTools name reader: {file_path}")
+        records = read_font_names_fonttools(file_path)
+    return records
+
+def read_font_names_fonttools(file_path):
+    records = []
+    try:
+        if file_path.lower().endswith('.ttc'):
+            with TTCollection(file_path) as ttc:
+                face_count = len(ttc.fonts)
+        else:
+            face_count = 1
+    except Exception:
+        log_to_file(f"[Warning] Failed to read font file: {file_path}", "warning")
+        return records
+    for index in range(face_count):
+        try:
+            tt = TTFont(file_path, fontNumber=index, lazy=True)
+            for record in tt['name'].names:
+                if record.nameID in (1, 4, 6):
+                    name = decode_name_record(record)
+                    if name:
+                        records.append((index, name))
+            tt.close()
+        except Exception:
+            log_to_file(f"[Warning] Failed to register font: {file_path}", "warning")
+    return records
+
+def read_font_file(file_path):
+    return read_font_names(file_path), read_font_coverage(file_path)
+
+def read_font_files_batch(file_paths):
+    return [(file_path, read_font_file(file_path)) for file_path in file_paths]
+
+def read_sfnt_coverage(file_path):
+    # Unicode coverage per face from the best cmap subtable (format 4 or 12), as sorted
+    # [start, end) codepoint ranges. Returns None when the file needs the fontTools reader.
+    try:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:4] == b'ttcf':
+                num_fonts = struct.unpack_from('>I', mm, 8)[0]
+                offsets = struct.unpack_from(f'>{num_fonts}I', mm, 12)
+            elif mm[:4] in SFNT_VERSIONS:
+                offsets = (0,)
+            else:
+                return None
+            coverage = {}
+            for index, offset in enumerate(offsets):
+                num_tables = struct.unpack_from('>H', mm, offset + 4)[0]
+                cmap = None
+                for i in range(num_tables):
+                    tag, _, table_offset, _ = struct.unpack_from('>4sLLL', mm, offset + 12 + i * 16)
+                    if tag == b'cmap':
+                        cmap = table_offset
+                        break
+                if cmap is None:
+                    continue
+                subtables = {}
+                for i in range(struct.unpack_from('>H', mm, cmap + 2)[0]):
+                    platform_id, encoding_id, sub_offset = struct.unpack_from('>HHL', mm, cmap + 4 + i * 8)
+                    subtables.setdefault((platform_id, encoding_id), cmap + sub_offset)
+                for key in CMAP_PREFERENCE:
+                    if key in subtables:
+                        ranges = read_cmap_ranges(mm, subtables[key])
+                        if ranges is None:
+                            return None
+                        coverage[index] = ranges
+                        break
+            return coverage
+    except (OSError, ValueError, struct.error):
+        return None
+
+def read_cmap_ranges(mm, pos):
+    fmt = struct.unpack_from('>H', mm, pos)[0]
+    spans = []
+    if fmt == 4:
+        seg_count = struct.unpack_from('>H', mm, pos + 6)[0] // 2
+        ends = struct.unpack_from(f'>{seg_count}H', mm, pos + 14)
+        starts = struct.unpack_from(f'>{seg_count}H', mm, pos + 16 + seg_count * 2)
+        deltas = struct.unpack_from(f'>{seg_count}h', mm, pos + 16 + seg_count * 4)
+        range_offsets_pos = pos + 16 + seg_count * 6
+        range_offsets = struct.unpack_from(f'>{seg_count}H', mm, range_offsets_pos)
+        for i in range(seg_count):
+            start, end = starts[i], ends[i]
+            if start > end or start == 0xFFFF:
+                continue
+            if range_offsets[i] == 0:
+                # Only the codepoint whose delta wraps to glyph 0 is unmapped.
+                hole = (-deltas[i]) & 0xFFFF
+                if start <= hole <= end:
+                    spans.append((start, hole))
+                    spans.append((hole + 1, end + 1))
+                else:
+                    spans.append((start, end + 1))
+            else:
+                base = range_offsets_pos + i * 2 + range_offsets[i]
+                for c in range(start, end + 1):
+                    glyph = struct.unpack_from('>H', mm, base + (c - start) * 2)[0]
+                    if glyph:
+                        spans.append((c, c + 1))
+    elif fmt == 12:
+        num_groups = struct.unpack_from('>L', mm, pos + 12)[0]
+        for i in range(num_groups):
+            start, end, glyph = struct.unpack_from('>3L', mm, pos + 16 + i * 12)
+            if glyph == 0:
+                start += 1
+            if start <= end:
+                spans.append((start, end + 1))
+    else:
+        return None
+    spans.sort()
+    ranges = array('I')
+    for start, end in spans:
+        if start >= end:
+            continue
+        if ranges and start <= ranges[-1]:
+            ranges[-1] = max(ranges[-1], end)
+        else:
+            ranges.extend((start, end))
+    return ranges
+
+def read_font_coverage(file_path):
+    coverage = read_sfnt_coverage(file_path)
+    if coverage is None:
+        log_to_file(f"[Font] Falling back to fontTools cmap reader: {file_path}")
+        coverage = read_font_coverage_fonttools(file_path)
+    return coverage
+
+def read_font_coverage_fonttools(file_path):
+    coverage = {}
+    try:
+        if file_path.lower().endswith('.ttc'):
+            with TTCollection(file_path) as ttc:
+                face_count = len(ttc.fonts)
+        else:
+            face_count = 1
+        for index in range(face_count):
+            tt = TTFont(file_path, fontNumber=index, lazy=True)
+            cmap = tt.getBestCmap()
+            tt.close()
+            if cmap is not None:
+                coverage[index] = codepoint_ranges(cp for cp, glyph in cmap.items() if glyph != '.notdef')
+    except Exception:
+        log_to_file(f"[Warning] Failed to read cmap: {file_path}", "warning")
+    return coverage
+
+def codepoint_ranges(codepoints):
+    ranges = array('I')
+    for cp in sorted(codepoints):
+        if ranges and cp == ranges[-1]:
+            ranges[-1] = cp + 1
+        else:
+            ranges.extend((cp, cp + 1))
+    return ranges
+
+def text_codepoints(chars):
+    return sorted({ord(c) for c in chars if ord(c) >= 0x20})
+
+def missing_codepoints(ranges, codepoints):
+    # Merge walk of sorted codepoints against [start, end) ranges.
+    missing = []
+    i, n = 0, len(ranges)
+    for cp in codepoints:
+        while i < n and ranges[i + 1] <= cp:
+            i += 2
+        if i >= n or cp < ranges[i]:
+            missing.append(cp)
+    return missing
+
+def encode_coverage(coverage):
+    # Native-endian arrays; the index cache never leaves this machine.
+    return b"".join(struct.pack('<HI', index, len(ranges)) + ranges.tobytes() for index, ranges in coverage.items())
+
+def decode_coverage(blob):
+    coverage = {}
+    pos = 0
+    while pos < len(blob):
+        index, count = struct.unpack_from('<HI', blob, pos)
+        pos += 6
+        ranges = array('I')
+        ranges.frombytes(blob[pos:pos + count * ranges.itemsize])
+        pos += count * ranges.itemsize
+        coverage[index] = ranges
+    return coverage
+
+class FontIndexCache:
+    # Name records and cmap coverage per font file, keyed by absolute path and validated by size + mtime.
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != FONT_INDEX_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS fonts")
+            self.conn.execute(f"PRAGMA user_version = {FONT_INDEX_VERSION}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS fonts "
+            "(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, names TEXT, coverage BLOB)"
+        )
+
+    def load(self):
+        rows = self.conn.execute("SELECT path, size, mtime, names, coverage FROM fonts")
+        return {path: (size, mtime, json.loads(names), decode_coverage(coverage))
+                for path, size, mtime, names, coverage in rows}
+
+    def update(self, changed, deleted):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO fonts (path, size, mtime, names, coverage) VALUES (?, ?, ?, ?, ?)",
+                [(path, size, mtime, json.dumps(records, ensure_ascii=False), encode_coverage(coverage))
+                 for path, size, mtime, records, coverage in changed]
+            )
+            self.conn.executemany("DELETE FROM fonts WHERE path = ?", [(path,) for path in deleted])
+
+    def close(self):
+        self.conn.close()
+
+class PackedStrings:
+    # Append-only list of strings stored as one UTF-8 buffer plus offsets, instead of one
+    # str object per entry.
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, strings=()):
+        self.data = bytearray()
+        self.offsets = array('I', [0])
+        for text in strings:
+            self.append(text)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def append(self, text):
+        self.data += text.encode('utf-8')
+        self.offsets.append(len(self.data))
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].decode('utf-8')
+
+class FontNameIndex:
+    # Read-only {name key: row} built once a scan is complete. Keys are packed in order of
+    # their hash, so a lookup is a bisect over a flat array plus one key comparison.
+    __slots__ = ("hashes", "keys", "rows")
+
+    def __init__(self, mapping):
+        order = sorted(mapping, key=hash)
+        self.hashes = array('q', map(hash, order))
+        self.keys = PackedStrings(order)
+        self.rows = array('I', (mapping[key] for key in order))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return (self.keys[i] for i in range(len(self.keys)))
+
+    def _find(self, key):
+        h = hash(key)
+        i = bisect_left(self.hashes, h)
+        while i < len(self.hashes) and self.hashes[i] == h:
+            if self.keys[i] == key:
+                return i
+            i += 1
+        return None
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __getitem__(self, key):
+        i = self._find(key)
+        if i is None:
+            raise KeyError(key)
+        return self.rows[i]
+
+    def get(self, key, default=None):
+        i = self._find(key)
+        return default if i is None else self.rows[i]
+
+class FontRecordTable:
+    # One row per registered name. The name maps hold row numbers; paths are stored once per file
+    # and each file's rows are contiguous, so a face is (path, index, name) rebuilt on demand.
+    __slots__ = ("paths", "first_rows", "row_paths", "row_indexes", "names")
+
+    def __init__(self):
+        self.paths = []
+        self.first_rows = array('I')
+        self.row_paths = array('I')
+        self.row_indexes = array('H')
+        self.names = PackedStrings()
+
+    def __len__(self):
+        return len(self.names)
+
+    def add_file(self, path, records):
+        path_id = len(self.paths)
+        self.paths.append(path)
+        self.first_rows.append(len(self.names))
+        for index, name in records:
+            self.row_paths.append(path_id)
+            self.row_indexes.append(index)
+            self.names.append(name)
+        return path_id
+
+    def file_rows(self, path_id):
+        end = self.first_rows[path_id + 1] if path_id + 1 < len(self.paths) else len(self.names)
+        return range(self.first_rows[path_id], end)
+
+    def records(self, path_id):
+        return [(self.row_indexes[row], self.names[row]) for row in self.file_rows(path_id)]
+
+    def path(self, row):
+        return self.paths[self.row_paths[row]]
+
+    def face(self, row):
+        return self.path(row), self.row_indexes[row], self.names[row]
+
+def pack_coverage(coverage):
+    # {face index: ranges} -> tuple indexed by face index, None where a face has no Unicode cmap.
+    if not coverage:
+        return ()
+    return tuple(coverage.get(index) for index in range(max(coverage) + 1))
+
+def unpack_coverage(packed):
+    return {index: ranges for index, ranges in enumerate(packed) if ranges is not None}
+
 class FontManager:
-    def __init__(self, search_dirs=None, smart_match=True):
+    def __init__(self, search_dirs=None, smart_match=True, cache_path=None, scan_jobs=1):
         self.font_map = {}
+        self.loose_map = {}
+        self.alternates = {}
+        self._trigram_index = None
+        self.faces = FontRecordTable()
+        self._files = {}
+        self.search_dirs = search_dirs
         self.smart_match = smart_match
+        self.scan_jobs = max(1, scan_jobs)
+        self.index_cache = self._open_index_cache(cache_path)
         self._scan_dirs(search_dirs)
 
+    def refresh(self):
+        # Re-walks the font directories and rebuilds the maps when any font file changed.
+        # Unchanged files reuse the records kept from the previous scan.
+        roots = [str(Path(d).resolve()) for d in self.target_dirs() if Path(d).exists()]
+        current = {file_path: (size, mtime) for file_path, size, mtime in self._iter_font_files(roots)}
+        if current == {path: entry[:2] for path, entry in self._files.items()}:
+            return False
+        self.font_map = {}
+        self.loose_map = {}
+        self.alternates = {}
+        self._trigram_index = None
+        self._scan_dirs(self.search_dirs)
+        return True
+
+    def target_dirs(self):
+        return self.search_dirs if self.search_dirs else self._get_system_font_dirs()
+
+    def _open_index_cache(self, cache_path):
+        if not cache_path:
+            return None
+        try:
+            return FontIndexCache(cache_path)
+        except (sqlite3.Error, OSError) as e:
+            log_to_file(f"[Warning] Font index cache unavailable: {cache_path} ({e})", "warning")
+            return None
+
     def _get_system_font_dirs(self):
         if sys.platform == "win32":
             dirs = [os.path.join(os.environ["WINDIR"], "Fonts")]
@@ -98,99 +812,467 @@ class FontManager:
         else:
             return ["/usr/share/fonts", os.path.expanduser("~/.local/share/fonts")]
 
+    def _iter_font_files(self, roots):
+        for root in roots:
+            stack = [root]
+            while stack:
+                directory = stack.pop()
+                try:
+                    with os.scandir(directory) as it:
+                        entries = list(it)
+                except OSError as e:
+                    log_to_file(f"[Warning] Failed to list font directory: {directory} ({e})", "warning")
+                    continue
+                # Errors are per entry, so one broken file or link does not hide its siblings.
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        if os.path.splitext(entry.name)[1].lower() not in FONT_EXTENSIONS:
+                            continue
+                        st = entry.stat()
+                    except OSError as e:
+                        log_to_file(f"[Warning] Failed to read font file: {entry.path} ({e})", "warning")
+                        continue
+                    yield entry.path, st.st_size, st.st_mtime_ns
+
     def _scan_dirs(self, custom_dirs):
         target_dirs = custom_dirs if custom_dirs else self._get_system_font_dirs()
         log_to_file(f"[System] Start scanning font directories: {target_dirs}")
-        
+        roots = [str(Path(d).resolve()) for d in target_dirs if Path(d).exists()]
+
+        # Records of the previous scan come back out of the face table for reuse.
+        cached = {
+            path: (size, mtime, self.faces.records(path_id), unpack_coverage(coverage))
+            for path, (size, mtime, path_id, coverage) in self._files.items()
+        }
+        if not cached and self.index_cache:
+            try:
+                cached = self.index_cache.load()
+            except sqlite3.Error as e:
+                log_to_file(f"[Warning] Failed to load font index cache: {e}", "warning")
+        files = list(self._iter_font_files(roots))
+        seen = {file_path for file_path, _, _ in files}
+        changed = []
+        for file_path, size, mtime in files:
+            entry = cached.get(file_path)
+            if not entry or entry[0] != size or entry[1] != mtime:
+                changed.append((file_path, size, mtime))
+
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             transient=True 
         ) as progress:
             task = progress.add_task(f"[cyan]Scanning fonts...", total=None)
-            for d in target_dirs:
-                p = Path(d)
-                if not p.exists(): continue
-                for file_path in p.rglob("*"):
-                    if file_path.suffix.lower() in ['.ttf', '.otf', '.ttc']:
-                        self._process_font_file(file_path)
-                        progress.update(task, description=f"[cyan]Fonts indexed: {len(self.font_map)} names...")
-            
+            fresh = self._read_changed_fonts([c[0] for c in changed], progress, task)
+            changed = [(file_path, size, mtime, *fresh[file_path]) for file_path, size, mtime in changed]
+
+            # Register in walk order so duplicate names resolve exactly as in a serial scan.
+            self.faces = FontRecordTable()
+            files_seen = {}
+            for file_path, size, mtime in files:
+                records, coverage = fresh[file_path] if file_path in fresh else cached[file_path][2:]
+                path_id = self._register_names(file_path, records)
+                files_seen[file_path] = (size, mtime, path_id, pack_coverage(coverage))
+            self._files = files_seen
+            # The dicts are only needed while registering; lookups use the compact form.
+            self.font_map = FontNameIndex(self.font_map)
+            self.loose_map = FontNameIndex(self.loose_map)
+
+            if self.index_cache:
+                deleted = [
+                    path for path in cached
+                    if path not in seen and any(path.startswith(os.path.join(r, "")) for r in roots)
+                ]
+                try:
+                    self.index_cache.update(changed, deleted)
+                except sqlite3.Error as e:
+                    log_to_file(f"[Warning] Failed to update font index cache: {e}", "warning")
+                log_to_file(
+                    f"[System] Font index cache: {len(seen) - len(changed)} reused, "
+                    f"{len(changed)} rescanned, {len(deleted)} removed."
+                )
+
             log_to_file(f"[System] Scan complete. Indexed {len(self.font_map)} font names.")
             console.print(f"[green][OK][/] Font index built: [bold cyan]{len(self.font_map)}[/] names.")
 
-    def _process_font_file(self, file_path):
-        try:
-            abs_path = str(file_path.resolve())
-            if file_path.suffix.lower() == '.ttc':
-                with TTCollection(file_path) as ttc:
-                    for i, _ in enumerate(ttc.fonts):
-                        self._register_font(abs_path, i)
-            else:
-                self._register_font(abs_path, 0)
-        except Exception:
-            log_to_file(f"[Warning] Failed to read font file: {file_path}", "warning")
+    def _read_changed_fonts(self, file_paths, progress, task):
+        fresh = {}
+        if self.scan_jobs > 1 and len(file_paths) > self.scan_jobs:
+            chunk_size = max(1, min(64, len(file_paths) // (self.scan_jobs * 4)))
+            chunks = [file_paths[i:i + chunk_size] for i in range(0, len(file_paths), chunk_size)]
+            log_to_file(f"[System] Reading {len(file_paths)} font files with {self.scan_jobs} workers.")
+            with ProcessPoolExecutor(self.scan_jobs, initializer=init_worker, initargs=(current_log_path(),)) as pool:
+                for batch in pool.map(read_font_files_batch, chunks):
+                    fresh.update(batch)
+                    progress.update(task, description=f"[cyan]Font files read: {len(fresh)}/{len(file_paths)}...")
+        else:
+            for file_path in file_paths:
+                fresh[file_path] = read_font_file(file_path)
+                progress.update(task, description=f"[cyan]Font files read: {len(fresh)}/{len(file_paths)}...")
+        return fresh
 
-    def _register_font(self, file_path, index):
-        try:
-            tt = TTFont(file_path, fontNumber=index, lazy=True)
-            for record in tt['name'].names:
-                if record.nameID in (1, 4, 6): 
-                    name = record.toUnicode()
-                    if name:
-                        key = normalize_font_key(name)
-                        self.font_map[key] = (file_path, index, name)
-                        self.font_map[key.replace(" ", "")] = (file_path, index, name)
-            tt.close()
-        except Exception:
-            log_to_file(f"[Warning] Failed to register font: {file_path}", "warning")
+    def _register_names(self, file_path, records):
+        path_id = self.faces.add_file(file_path, records)
+        for row in self.faces.file_rows(path_id):
+            name = self.faces.names[row]
+            key = normalize_font_key(name)
+            previous = self.font_map.get(key)
+            if previous is not None and self.faces.row_paths[previous] != path_id:
+                # Other files with the same name stay available for coverage-based selection.
+                self.alternates.setdefault(key, [previous]).append(row)
+            self.font_map[key] = row
+            self.font_map[key.replace(" ", "")] = row
+            self.loose_map[loose_font_key(name)] = row
+        return path_id
+
+    def find_font(self, ass_name, chars=None):
+        row = self._lookup_font(ass_name)
+        if row is None:
+            return None
+        key = normalize_font_key(self.faces.names[row])
+        if chars and key in self.alternates:
+            # Only copies of the same face compete (same name set), so a Bold face never
+            # replaces a Regular one. Fewest missing glyphs first, then the smallest file.
+            names = self._face_names(row)
+            candidates = [alt for alt in self.alternates[key] if self._face_names(alt) == names]
+            codepoints = text_codepoints(chars)
+            row = min(candidates, key=lambda alt: self._coverage_rank(alt, codepoints))
+        return self.faces.face(row)
+
+    def _face_names(self, row):
+        faces = self.faces
+        index = faces.row_indexes[row]
+        return {normalize_font_key(faces.names[r]) for r in faces.file_rows(faces.row_paths[row]) if faces.row_indexes[r] == index}
 
-    def find_font(self, ass_name):
+    def _coverage_rank(self, row, codepoints):
+        size, _, _, coverage = self._files[self.faces.path(row)]
+        return len(self._missing(coverage, self.faces.row_indexes[row], codepoints)), size
+
+    def missing_glyphs(self, info, chars):
+        coverage = self._files[info[0]][3]
+        return "".join(chr(cp) for cp in self._missing(coverage, info[1], text_codepoints(chars)))
+
+    def _missing(self, coverage, index, codepoints):
+        ranges = coverage[index] if index < len(coverage) else None
+        # Faces without a Unicode cmap are not judged.
+        return missing_codepoints(ranges, codepoints) if ranges is not None else []
+
+    def _lookup_font(self, ass_name):
         target = normalize_font_key(ass_name)
         if target in self.font_map: return self.font_map[target]
         if self.smart_match:
+            candidates = [target]
             for s in SMART_SUFFIXES:
                 if target.endswith(s):
                     clean = target.replace(s, "")
                     if clean in self.font_map: return self.font_map[clean]
+                    candidates.append(clean)
+            for candidate in candidates:
+                loose = loose_font_key(candidate)
+                if loose in self.loose_map: return self.loose_map[loose]
         return None
 
+    def suggest_fonts(self, ass_name, limit=SUGGESTION_LIMIT):
+        # Closest library names by trigram overlap (Dice coefficient).
+        if self._trigram_index is None:
+            self._trigram_index = {}
+            for key in self.loose_map:
+                for gram in name_trigrams(key):
+                    self._trigram_index.setdefault(gram, []).append(key)
+        query = name_trigrams(loose_font_key(ass_name))
+        overlap = Counter()
+        for gram in query:
+            overlap.update(self._trigram_index.get(gram, ()))
+        scored = []
+        for key, common in overlap.items():
+            score = 2 * common / (len(query) + len(name_trigrams(key)))
+            if score >= SUGGESTION_MIN_SCORE:
+                scored.append((score, key))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self.faces.face(self.loose_map[key]) for _, key in scored[:limit]]
+
+def ass_weight(value):
+    # libass: 1 and -1 mean bold, 0 or less regular, anything else is a numeric weight.
+    value = int(value)
+    if value in (1, -1):
+        return BOLD_FONT_WEIGHT
+    return REGULAR_FONT_WEIGHT if value <= 0 else value
+
+def is_ass_int(value):
+    return value.strip().lstrip('-').isdigit()
+
 class AssParser:
     def __init__(self, filepath):
         self.text_by_font = {}
+        # (weight, italic) pairs each font is drawn in, for instancing variable fonts.
+        self.styles_by_font = {}
         self._parse(filepath)
 
     def _parse(self, filepath):
-        with open(filepath, 'r', encoding='utf-8-sig', errors='ignore') as f:
-            lines = f.readlines()
+        # Single streaming pass. Characters are collected per style name and resolved
+        # to fonts at the end, so styles defined after the events still apply.
         styles = {}
+        style_variants = {}
+        chars_by_style = {}
+        chars_by_font = {}
+        variants = set()
         section = None
-        for line in lines:
-            line = line.strip()
-            if line.startswith('['):
-                section = line
-                continue
-            if section == '[V4+ Styles]' and line.startswith('Style:'):
-                parts = line.split(',')
-                if len(parts) > 2:
-                    styles[parts[0].replace('Style:', '').strip()] = parts[1].strip()
-        for line in lines:
-            if line.startswith('Dialogue:'):
-                parts = line.split(',', 9)
-                if len(parts) >= 10:
-                    style_name = parts[3].strip()
-                    font = styles.get(style_name, 'Default')
-                    text = re.sub(r'\{.*?\}|\\N|\\n', '', parts[9].strip())
-                    self.text_by_font.setdefault(font, set()).update(text)
-
-def subset_font_task(font_path, font_index, text, output_dir, new_family_name, disable_subset=False):
+        with open(filepath, 'r', encoding='utf-8-sig', errors='ignore') as f:
+            for raw in f:
+                if raw.startswith('Dialogue:'):
+                    parts = raw.split(',', 9)
+                    if len(parts) >= 10:
+                        self._credit_text(parts[9].strip(), parts[3].strip(), chars_by_style, chars_by_font, variants)
+                    continue
+                line = raw.strip()
+                if line.startswith('['):
+                    section = line
+                elif section == '[V4+ Styles]' and line.startswith('Style:'):
+                    parts = line.split(',')
+                    if len(parts) > 2:
+                        style_name = parts[0].replace('Style:', '').strip()
+                        styles[style_name] = parts[1].strip()
+                        if len(parts) > 8 and is_ass_int(parts[7]) and is_ass_int(parts[8]):
+                            style_variants[style_name] = (ass_weight(parts[7]), int(parts[8]) != 0)
+        for (style_name, line_style), chars in chars_by_style.items():
+            if style_name in styles:
+                font = styles[style_name]
+            else:
+                font = styles.get(line_style, 'Default')
+            self.text_by_font.setdefault(font, set()).update(chars)
+        for font, chars in chars_by_font.items():
+            self.text_by_font.setdefault(font, set()).update(chars)
+        for font, style_name, line_style, weight, italic in variants:
+            style_key = style_name if style_name in styles else line_style
+            if font is None:
+                font = styles.get(style_key, 'Default')
+            style_weight, style_italic = style_variants.get(style_key, (REGULAR_FONT_WEIGHT, False))
+            self.styles_by_font.setdefault(font, set()).add(
+                (style_weight if weight is None else weight, style_italic if italic is None else italic)
+            )
+
+    def _credit_text(self, text, line_style, chars_by_style, chars_by_font, variants):
+        # Walks override blocks the way libass does: \fn switches the font, \r resets to
+        # the line style (or a named style, if it exists), and \p<n> drawings render no glyphs.
+        # \b and \i override the style's weight and slant until the next \r.
+        style = line_style
+        font = None
+        weight = None
+        italic = None
+        drawing = False
+        pos = 0
+        while pos < len(text):
+            start = text.find('{', pos)
+            end = text.find('}', start) if start >= 0 else -1
+            run = text[pos:start] if end >= 0 else text[pos:]
+            if run and not drawing:
+                run = run.replace('\\N', '').replace('\\n', '').replace('\\h', '\u00a0')
+                if font is None:
+                    chars_by_style.setdefault((style, line_style), set()).update(run)
+                else:
+                    chars_by_font.setdefault(font, set()).update(run)
+                variants.add((font, style, line_style, weight, italic))
+            if end < 0:
+                break
+            for tag in text[start + 1:end].split('\\')[1:]:
+                if tag.startswith('fn'):
+                    name = tag[2:].strip()
+                    font = name if name and name != '0' else None
+                elif tag.startswith('r'):
+                    style = tag[1:].strip() or line_style
+                    font = None
+                    weight = None
+                    italic = None
+                    drawing = False
+                elif tag.startswith('b') and (not tag[1:].strip() or is_ass_int(tag[1:])):
+                    weight = ass_weight(tag[1:]) if tag[1:].strip() else None
+                elif tag.startswith('i') and (not tag[1:].strip() or is_ass_int(tag[1:])):
+                    italic = int(tag[1:]) != 0 if tag[1:].strip() else None
+                elif tag.startswith('p') and tag[1:].strip().isdigit():
+                    drawing = int(tag[1:]) > 0
+            pos = end + 1
+
+_file_digests = {}
+_font_axes = {}
+_source_fonts = OrderedDict()
+
+def load_source_font_data(font_path):
+    # Source font bytes stay in memory (LRU per process), so a TTC or a font used by
+    # several episodes is read from disk once. TTFonts are reopened lazily from these
+    # bytes because Subsetter modifies the font it is given in place.
+    st = os.stat(font_path)
+    memo_key = (str(font_path), st.st_size, st.st_mtime_ns)
+    if memo_key in _source_fonts:
+        _source_fonts.move_to_end(memo_key)
+        return _source_fonts[memo_key]
+    data = Path(font_path).read_bytes()
+    _source_fonts[memo_key] = data
+    total = sum(len(v) for v in _source_fonts.values())
+    while total > SOURCE_FONT_CACHE_BYTES and len(_source_fonts) > 1:
+        _, evicted = _source_fonts.popitem(last=False)
+        total -= len(evicted)
+    return data
+
+def file_digest(file_path):
+    st = os.stat(file_path)
+    memo_key = (str(file_path), st.st_size, st.st_mtime_ns)
+    if memo_key not in _file_digests:
+        _file_digests[memo_key] = hashlib.sha256(load_source_font_data(file_path)).hexdigest()
+    return _file_digests[memo_key]
+
+class SubsetCache:
+    # Finished subsets stored by content key, evicted least-recently-used first.
+    # The obfuscated family name is not part of the key; hits are renamed again.
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.blob_dir = self.cache_dir / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "subsets.db"
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SUBSET_CACHE_VERSION:
+                conn.execute("DROP TABLE IF EXISTS subsets")
+                conn.execute(f"PRAGMA user_version = {SUBSET_CACHE_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS subsets "
+                "(key TEXT PRIMARY KEY, size INTEGER, last_used REAL)"
+            )
+        self.evict()
+
+    def _connect(self):
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def _blob_path(self, key):
+        return self.blob_dir / key[:2] / key
+
+    def make_key(self, font_path, font_index, text, options):
+        h = hashlib.sha256()
+        h.update(file_digest(font_path).encode())
+        h.update(f"\0{font_index}\0{json.dumps(options)}\0".encode())
+        h.update("".join(sorted(text)).encode('utf-8', 'surrogatepass'))
+        return h.hexdigest()
+
+    def fetch(self, key):
+        try:
+            with self._connect() as conn:
+                if not conn.execute("SELECT 1 FROM subsets WHERE key = ?", (key,)).fetchone():
+                    return None
+                data = self._blob_path(key).read_bytes()
+                conn.execute("UPDATE subsets SET last_used = ? WHERE key = ?", (time.time(), key))
+            return data
+        except (sqlite3.Error, OSError) as e:
+            log_to_file(f"[Warning] Subset cache read failed: {key} ({e})", "warning")
+            return None
+
+    def store(self, key, src):
+        blob = self._blob_path(key)
+        try:
+            blob.parent.mkdir(exist_ok=True)
+            tmp = blob.with_name(f"{key}.{os.getpid()}.tmp")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, blob)
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO subsets (key, size, last_used) VALUES (?, ?, ?)",
+                    (key, blob.stat().st_size, time.time())
+                )
+            self.evict()
+        except (sqlite3.Error, OSError) as e:
+            log_to_file(f"[Warning] Subset cache write failed: {key} ({e})", "warning")
+
+    def evict(self):
+        with self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM subsets").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for key, size in conn.execute("SELECT key, size FROM subsets ORDER BY last_used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM subsets WHERE key = ?", (key,))
+                try:
+                    self._blob_path(key).unlink()
+                except OSError:
+                    pass
+                total -= size
+                log_to_file(f"[Cache] Evicted subset {key} ({size} bytes)")
+
+def text_layout_scripts(text):
+    tags = {"DFLT"}
+    for script in {script for ch in set(text) for script in font_unicodedata.script_extension(ch)}:
+        tags.update(font_unicodedata.ot_tags_from_script(script))
+    return sorted(tags)
+
+def subset_profile_options(profile, text):
+    options = dict(SUBSET_PROFILES[profile])
+    if profile != "full":
+        options["layout_scripts"] = text_layout_scripts(text)
+    return options
+
+def variable_font_axes(font_path, font_index):
+    # {axis tag: (min, default, max)} for a variable font, None for a static one.
+    st = os.stat(font_path)
+    memo_key = (str(font_path), font_index, st.st_size, st.st_mtime_ns)
+    if memo_key not in _font_axes:
+        axes = None
+        try:
+            with TTFont(font_path, fontNumber=font_index, lazy=True) as tt:
+                if 'fvar' in tt:
+                    axes = {a.axisTag: (a.minValue, a.defaultValue, a.maxValue) for a in tt['fvar'].axes}
+        except Exception as e:
+            log_to_file(f"[Warning] Failed to read variation axes: {font_path} ({e})", "warning")
+        _font_axes[memo_key] = axes
+    return _font_axes[memo_key]
+
+def instance_locations(font_path, font_index, styles, args):
+    # One static instance per (weight, italic) a variable font is drawn in. [None] keeps the font as is.
+    axes = None if args.disable_subset else variable_font_axes(font_path, font_index)
+    if not axes:
+        return [None]
+    locations = []
+    for weight, italic in sorted(styles or {(REGULAR_FONT_WEIGHT, False)}):
+        location = {tag: default for tag, (_, default, _) in axes.items()}
+        # Regular text keeps the axis default; only explicit weights move the axis.
+        if "wght" in axes and weight != REGULAR_FONT_WEIGHT:
+            location["wght"] = min(max(weight, axes["wght"][0]), axes["wght"][2])
+        if italic and "ital" in axes:
+            location["ital"] = axes["ital"][2]
+        elif italic and "slnt" in axes:
+            location["slnt"] = axes["slnt"][0]
+        if location not in locations:
+            locations.append(location)
+    return locations
+
+def instance_label(location):
+    return "-".join(f"{tag.strip()}{value:g}" for tag, value in sorted(location.items()))
+
+def instantiate_static(tt, location):
+    instancer.instantiateVariableFont(tt, location, inplace=True, downgradeCFF2='CFF2' in tt)
+    # The instancer sets usWeightClass; libass also reads the bold/italic style bits.
+    bold = tt['OS/2'].usWeightClass >= BOLD_FONT_WEIGHT
+    italic = location.get("ital", 0) > 0 or location.get("slnt", 0) < 0
+    tt['head'].macStyle = (tt['head'].macStyle & ~0b11) | (0b01 if bold else 0) | (0b10 if italic else 0)
+    selection = tt['OS/2'].fsSelection & ~0b1100001
+    if bold:
+        selection |= 1 << 5
+    if italic:
+        selection |= 1 << 0
+    if not bold and not italic:
+        selection |= 1 << 6
+    tt['OS/2'].fsSelection = selection
+    return tt
+
+def subset_font_task(font_path, font_index, text, output_dir, new_family_name, disable_subset=False, subset_cache=None,
+                     profile=DEFAULT_SUBSET_PROFILE, location=None):
     name = Path(font_path).stem
     if font_index > 0: name += f"_sub{font_index}"
+    if location: name += f"_{instance_label(location)}"
     orig_ext = Path(font_path).suffix.lower()
     out_ext = '.otf' if orig_ext == '.otf' else '.ttf'
     mime = "application/vnd.ms-opentype" if out_ext == '.otf' else "application/x-truetype-font"
-    out_path = Path(output_dir) / f"{name}_subset{out_ext}"
-    obfuscated_path = Path(output_dir) / f"{name}_{new_family_name}{out_ext}"
+    out_path = Path(output_dir) / f"{name}_{new_family_name or 'subset'}{out_ext}"
     
     if disable_subset:
         log_to_file(f"[Font] Subset disabled. Using original file: {font_path}")
@@ -198,112 +1280,285 @@ def subset_font_task(font_path, font_index, text, output_dir, new_family_name, d
 
     text_str = "".join(text)
     if not text_str: return None, None
-    log_to_file(f"[Font] Subsetting: src='{font_path}' index={font_index} -> dst='{out_path}'")
-    args = [
-        str(font_path), f"--text={text_str}", f"--output-file={str(out_path)}",
-        f"--font-number={font_index}", "--layout-features=*", "--name-IDs=*",
-    ]
-    if orig_ext == '.woff2': args.append("--flavor=woff2")
+    profile_options = subset_profile_options(profile, text_str)
+    options = subset.Options(**profile_options)
+    options.font_number = font_index
+    if orig_ext == '.woff2': options.flavor = 'woff2'
     try:
-        subset_main(args)
-        if obfuscate_font_names(str(out_path), new_family_name):
-            shutil.move(str(out_path), str(obfuscated_path))
-            return str(obfuscated_path), mime
+        key_options = dict(profile_options, instance=location) if location else profile_options
+        if not new_family_name:
+            # Cached bytes carry the family name they were saved with; kept names need their own entry.
+            key_options = dict(key_options, keep_names=True)
+        cache_key = subset_cache.make_key(font_path, font_index, text_str, key_options) if subset_cache else None
+        cached = subset_cache.fetch(cache_key) if cache_key else None
+        if cached:
+            log_to_file(f"[Font] Subset cache hit: src='{font_path}' index={font_index} -> dst='{out_path}'")
+            tt = TTFont(BytesIO(cached), recalcTimestamp=False)
+        else:
+            log_to_file(f"[Font] Subsetting ({profile}): src='{font_path}' index={font_index} -> dst='{out_path}'")
+            tt = subset.load_font(BytesIO(load_source_font_data(font_path)), options, dontLoadGlyphNames=True)
+            subsetter = subset.Subsetter(options)
+            subsetter.populate(text=text_str)
+            subsetter.subset(tt)
+            if location:
+                # Instancing the subset gives the same outlines as instancing first, on far fewer glyphs.
+                log_to_file(f"[Font] Instancing variable font at {location}: src='{font_path}'")
+                instantiate_static(tt, location)
+        if new_family_name:
+            obfuscate_font_names(tt, new_family_name)
+        subset.save_font(tt, str(out_path), options)
+        tt.close()
+        if cache_key and not cached:
+            subset_cache.store(cache_key, out_path)
         return str(out_path), mime
     except Exception as e:
         log_to_file(f"[Error] Subset failed {name}: {e}", "error")
         return None, None
 
-def rewrite_ass_files(ass_files, font_name_map, temp_dir):
-    if not font_name_map:
-        return ass_files
+def run_subset_tasks(tasks, subset_pool=None, on_done=None, stage=None):
+    # Results come back in task order regardless of completion order.
+    if subset_pool is None:
+        results = []
+        for task in tasks:
+            results.append(subset_font_task(*task))
+            if on_done: on_done()
+        return results
+    futures = [subset_pool.submit(cpu_timed_call, subset_font_task, *task) for task in tasks]
+    for _ in as_completed(futures):
+        if on_done: on_done()
+    results = []
+    for f in futures:
+        result, cpu, peak = f.result()
+        if stage:
+            stage.add_cpu(cpu)
+            stage.add_worker_rss(peak)
+        results.append(result)
+    return results
 
-    temp_ass_dir = Path(temp_dir) / "temp_ass"
-    temp_ass_dir.mkdir(exist_ok=True)
-    rewritten_files = []
-    normalized_map = {normalize_font_key(k): v for k, v in font_name_map.items()}
+def print_subset_sizes(subset_tasks, results):
+    # Attachment bytes with --disable-subset (the whole source file) against the subset.
+    # Instances of one variable font share their source, which counts once in the total.
+    rows = []
+    sources = {}
+    for task, (path, _) in zip(subset_tasks, results):
+        file_path, font_index, location = task[0], task[1], task[8]
+        if not path or path == str(file_path):
+            continue
+        try:
+            before = sources.setdefault((file_path, font_index), os.path.getsize(file_path))
+            rows.append((Path(file_path).name + (f" #{font_index}" if font_index else "") + (f" ({instance_label(location)})" if location else ""),
+                         before, os.path.getsize(path)))
+        except OSError:
+            continue
+    if not rows:
+        return
+    table = Table(title=f"Subset Sizes ({subset_tasks[0][7]})", box=box.ROUNDED)
+    table.add_column("Source Font", style="cyan")
+    table.add_column("Source (KB)", justify="right", style="dim")
+    table.add_column("Attachment (KB)", justify="right")
+    table.add_column("Saved", justify="right", style="green")
+    total_before, total_after = sum(sources.values()), sum(r[2] for r in rows)
+    for i, (label, before, after) in enumerate(rows + [("Total", total_before, total_after)]):
+        table.add_row(label, f"{before / 1024:.1f}", f"{after / 1024:.1f}",
+                      f"{(1 - after / before) * 100:.1f}%" if before else "---", end_section=i == len(rows) - 1)
+    console.print(table)
+    log_to_file(f"[Font] Subset sizes ({subset_tasks[0][7]}): {total_before} -> {total_after} bytes for {len(rows)} fonts.")
+
+def rewrite_ass_file(ass_path, out_ass, font_name_map, normalized_map):
+    map_lines = [f"; FontMap: {src} -> {dst}\n" for src, dst in font_name_map.items()]
+    replacements = {}
 
-    for ass_path in ass_files:
-        with open(ass_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
-            lines = f.readlines()
+    def _replace_fn(match):
+        font_name = match.group(1)
+        if font_name not in replacements:
+            replacement = normalized_map.get(normalize_font_key(font_name))
+            replacements[font_name] = f"\\fn{replacement}" if replacement else match.group(0)
+        return replacements[font_name]
 
-        output_lines = []
-        in_script_info = False
-        inserted_map = False
+    # Lines are held back only until the first [Script Info] header, because a file
+    # without one gets the FontMap block prepended.
+    pending = []
+    write = pending.append
+    has_script_info = False
+    in_script_info = False
+    inserted_map = False
 
-        for line in lines:
+    with open(ass_path, 'r', encoding='utf-8-sig', errors='ignore') as src, \
+         open(out_ass, 'w', encoding='utf-8-sig', errors='ignore') as dst:
+        for line in src:
             stripped = line.strip()
             if stripped.startswith("[") and stripped.endswith("]"):
                 if stripped == "[Script Info]":
                     in_script_info = True
                     inserted_map = False
+                    if not has_script_info:
+                        has_script_info = True
+                        dst.writelines(pending)
+                        pending = None
+                        write = dst.write
                 else:
                     if in_script_info and not inserted_map:
-                        for src, dst in font_name_map.items():
-                            output_lines.append(f"; FontMap: {src} -> {dst}\n")
+                        for map_line in map_lines:
+                            write(map_line)
                         inserted_map = True
                     in_script_info = False
 
             if stripped.startswith("Style:"):
                 parts = line.split(',')
                 if len(parts) > 2:
-                    original = parts[1].strip()
-                    replacement = normalized_map.get(normalize_font_key(original))
+                    replacement = normalized_map.get(normalize_font_key(parts[1].strip()))
                     if replacement:
                         parts[1] = replacement
                         line = ",".join(parts)
 
             if "\\fn" in line:
-                def _replace_fn(match):
-                    font_name = match.group(1)
-                    replacement = normalized_map.get(normalize_font_key(font_name))
-                    return f"\\fn{replacement}" if replacement else match.group(0)
-                line = re.sub(r"\\fn([^\\}]+)", _replace_fn, line)
+                line = ASS_FN_RE.sub(_replace_fn, line)
 
-            output_lines.append(line)
+            write(line)
 
         if in_script_info and not inserted_map:
-            output_lines.append("\n")
-            for src, dst in font_name_map.items():
-                output_lines.append(f"; FontMap: {src} -> {dst}\n")
+            write("\n")
+            for map_line in map_lines:
+                write(map_line)
 
-        if not any(l.strip() == "[Script Info]" for l in output_lines):
-            mapping_lines = ["[Script Info]\n"]
-            for src, dst in font_name_map.items():
-                mapping_lines.append(f"; FontMap: {src} -> {dst}\n")
-            output_lines = mapping_lines + ["\n"] + output_lines
+        if not has_script_info:
+            dst.write("[Script Info]\n")
+            dst.writelines(map_lines)
+            dst.write("\n")
+            dst.writelines(pending)
+    return out_ass
 
-        out_ass = temp_ass_dir / ass_path.name
-        with open(out_ass, 'w', encoding='utf-8-sig', errors='ignore') as f:
-            f.writelines(output_lines)
-        rewritten_files.append(out_ass)
+def rewrite_ass_files(ass_files, font_name_map, temp_dir):
+    if not font_name_map:
+        return ass_files
+
+    temp_ass_dir = Path(temp_dir) / "temp_ass"
+    temp_ass_dir.mkdir(exist_ok=True)
+    normalized_map = {normalize_font_key(k): v for k, v in font_name_map.items()}
+    jobs = [(ass_path, temp_ass_dir / ass_path.name, font_name_map, normalized_map) for ass_path in ass_files]
+
+    if len(jobs) == 1:
+        return [rewrite_ass_file(*jobs[0])]
+    with ThreadPoolExecutor(max_workers=min(len(jobs), ASS_REWRITE_THREADS)) as pool:
+        return list(pool.map(lambda job: rewrite_ass_file(*job), jobs))
+
+def find_episode_ass_files(mkv_path):
+    base_name = mkv_path.stem
+    all_ass_files = list(mkv_path.parent.glob("*.ass"))
+    return [f for f in all_ass_files if f.name.lower().startswith(base_name.lower())]
+
+def collect_needed_fonts(ass_files, font_styles=None):
+    # font_styles, when given, receives the (weight, italic) pairs each font is drawn in.
+    needed_fonts = {}
+    for ass in ass_files:
+        p = AssParser(ass)
+        for font, chars in p.text_by_font.items():
+            if normalize_font_key(font) in IGNORE_FONTS:
+                continue
+            needed_fonts.setdefault(font, set()).update(chars)
+            if font_styles is not None:
+                font_styles.setdefault(font, set()).update(p.styles_by_font.get(font, ()))
+    return needed_fonts
+
+class BatchPlan:
+    # One shared subset per font face, built from the union charset of every episode in the batch.
+    def __init__(self):
+        self.needed_fonts = {}
+        self.font_styles = {}
+        self.subsets = {}
+
+    def build(self, mkvs, args, font_manager, temp_dir, subset_pool=None, subset_cache=None):
+        faces = {}
+        with console.status("[bold green]Planning batch font usage...", spinner="dots"):
+            for mkv_path in mkvs:
+                ass_files = find_episode_ass_files(mkv_path)
+                if not ass_files:
+                    continue
+                font_styles = {}
+                with ProfileStage("ass_parse", mkv_path.name):
+                    needed_fonts = collect_needed_fonts(ass_files, font_styles)
+                self.needed_fonts[mkv_path] = needed_fonts
+                self.font_styles[mkv_path] = font_styles
+                for font_name, chars in needed_fonts.items():
+                    info = font_manager.find_font(font_name, chars)
+                    if info:
+                        face_chars, face_styles = faces.setdefault((info[0], info[1]), (set(), set()))
+                        face_chars.update(chars)
+                        face_styles.update(font_styles.get(font_name, ()))
+
+        log_to_file(f"[Plan] {len(faces)} font faces shared across {len(self.needed_fonts)} episodes.")
+        if not faces:
+            return
+
+        subset_tasks = []
+        task_faces = []
+        face_names = {}
+        for (file_path, font_index), (chars, styles) in faces.items():
+            face_names[(file_path, font_index)] = obfuscated_name(file_path, font_index, chars)
+            for location in instance_locations(file_path, font_index, styles, args):
+                subset_tasks.append((file_path, font_index, chars, temp_dir,
+                                     face_names[(file_path, font_index)], args.disable_subset, subset_cache, args.subset_profile, location))
+                task_faces.append((file_path, font_index))
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            console=console
+        ) as progress:
+            task = progress.add_task("[green]Generating shared font subsets...", total=len(subset_tasks))
+            with ProfileStage("subset") as stage:
+                results = run_subset_tasks(subset_tasks, subset_pool, lambda: progress.advance(task), stage)
+                for path, _ in results:
+                    stage.add_output(path)
+        print_subset_sizes(subset_tasks, results)
+        for face in face_names:
+            self.subsets[face] = ([], face_names[face])
+        for face, result in zip(task_faces, results):
+            self.subsets[face][0].append(result)
+        console.print(f"[green][OK][/] Batch plan: [bold cyan]{len(faces)}[/] shared font subsets for {len(self.needed_fonts)} episodes.")
 
-    return rewritten_files
+    def episode_fonts(self, valid_fonts):
+        attachments = []
+        font_name_map = {}
+        for font_name, info, _, _ in valid_fonts:
+            entry = self.subsets.get((info[0], info[1]))
+            if not entry:
+                continue
+            results, family_name = entry
+            font_name_map[font_name] = family_name
+            for path, mime in results:
+                if path and (path, mime) not in attachments:
+                    attachments.append((path, mime))
+        return attachments, font_name_map
 
-def process_mkv(mkv_path, args, font_manager, temp_dir):
+def analyze_episode(mkv_path, args, font_manager, needed_fonts=None, show_status=True, source=None, font_styles=None):
     log_to_file(f"\n{'='*20}\n[File] Start: {mkv_path.absolute()}\n{'='*20}")
     console.print()
     console.rule(f"[bold blue]Processing: {mkv_path.name}[/]")
-    base_name = mkv_path.stem
-    
-    all_ass_files = list(mkv_path.parent.glob("*.ass"))
-    ass_files = [f for f in all_ass_files if f.name.lower().startswith(base_name.lower())]
+
+    ass_files = find_episode_ass_files(mkv_path)
+    if not ass_files and source:
+        ass_files = source.extract_embedded_ass()
+        if ass_files:
+            log_to_file(f"[Source] No external ASS. Analyzing {len(ass_files)} embedded ASS tracks.")
     
     if not ass_files:
         console.print("[yellow]Warning: No matching ASS subtitles found. Skipping.[/]")
         log_to_file("[Warning] No matching ASS subtitles found", "warning")
-        return
+        return None
 
     log_to_file(f"[Subtitles] Found ASS files: {[f.name for f in ass_files]}")
 
-    needed_fonts = {}
-    with console.status("[bold green]Parsing subtitle font usage...", spinner="dots"):
-        for ass in ass_files:
-            p = AssParser(ass)
-            for font, chars in p.text_by_font.items():
-                if normalize_font_key(font) in IGNORE_FONTS:
-                    continue
-                needed_fonts.setdefault(font, set()).update(chars)
+    if needed_fonts is None and show_status:
+        font_styles = {}
+        with console.status("[bold green]Parsing subtitle font usage...", spinner="dots"), \
+             ProfileStage("ass_parse", mkv_path.name):
+            needed_fonts = collect_needed_fonts(ass_files, font_styles)
+    elif needed_fonts is None:
+        font_styles = {}
+        with ProfileStage("ass_parse", mkv_path.name):
+            needed_fonts = collect_needed_fonts(ass_files, font_styles)
     
     log_to_file(f"[Analysis] Required fonts: {list(needed_fonts.keys())}")
 
@@ -315,29 +1570,62 @@ def process_mkv(mkv_path, args, font_manager, temp_dir):
     table.add_column("Char Count", justify="right", style="magenta")
 
     valid_fonts = [] 
+    missing_fonts = []
+    reused_fonts = []
 
-    for font_name, chars in needed_fonts.items():
-        info = font_manager.find_font(font_name)
-        char_count = len(chars)
-        
-        if info:
-            file_path, font_index, real_name = info
-            log_to_file(f"[Match] OK: ASS='{font_name}' -> File='{file_path}'")
-            table.add_row(
-                font_name, 
-                "[green]OK[/]", 
-                f"{real_name}\n({Path(file_path).name})", 
-                str(char_count)
-            )
-            valid_fonts.append((font_name, info, chars))
-        else:
-            log_to_file(f"[Match] Missing in system: '{font_name}'", "warning")
-            table.add_row(
-                font_name, 
-                "[bold red]Missing[/]", 
-                "---", 
-                str(char_count)
-            )
+    with ProfileStage("font_match", mkv_path.name):
+        for font_name, chars in needed_fonts.items():
+            info = font_manager.find_font(font_name, chars)
+            char_count = len(chars)
+            attached = source.find_attachment(font_name, chars) if source else None
+
+            if attached and not attached[1]:
+                log_to_file(f"[Source] Reusing attachment for '{font_name}': {attached[0].get('file_name')}")
+                table.add_row(
+                    font_name,
+                    "[blue]Attached[/]",
+                    f"{attached[0].get('file_name')}\n(in source MKV)",
+                    str(char_count)
+                )
+                reused_fonts.append(font_name)
+            elif info:
+                if attached:
+                    # The library face replaces the incomplete attachment of the same family.
+                    log_to_file(f"[Source] Attachment {attached[0].get('file_name')} lacks {len(attached[1])} glyphs for '{font_name}'. Replacing it.")
+                    source.drop_attachment(attached[0])
+                file_path, font_index, real_name = info
+                log_to_file(f"[Match] OK: ASS='{font_name}' -> File='{file_path}'")
+                source_text = f"{real_name}\n({Path(file_path).name})"
+                missing_glyphs = font_manager.missing_glyphs(info, chars)
+                if missing_glyphs:
+                    log_to_file(f"[Match] '{font_name}' lacks {len(missing_glyphs)} glyphs: {missing_glyphs}", "warning")
+                    more = "..." if len(missing_glyphs) > GLYPH_REPORT_LIMIT else ""
+                    source_text += f"\nMissing: {missing_glyphs[:GLYPH_REPORT_LIMIT]}{more}"
+                table.add_row(
+                    font_name, 
+                    "[yellow]Partial[/]" if missing_glyphs else "[green]OK[/]", 
+                    source_text, 
+                    str(char_count)
+                )
+                valid_fonts.append((font_name, info, chars, (font_styles or {}).get(font_name, set())))
+            else:
+                log_to_file(f"[Match] Missing in system: '{font_name}'", "warning")
+                missing_fonts.append(font_name)
+                suggestions = font_manager.suggest_fonts(font_name) if not attached else []
+                if attached:
+                    log_to_file(f"[Source] Attachment {attached[0].get('file_name')} lacks glyphs for '{font_name}': {''.join(attached[1])}", "warning")
+                    source_text = f"Attached, {len(attached[1])} glyphs missing\n({attached[0].get('file_name')})"
+                elif suggestions:
+                    log_to_file(f"[Match] Closest library fonts for '{font_name}': {[s[2] for s in suggestions]}")
+                    source_text = "Did you mean:\n" + "\n".join(f"{name} ({Path(path).name})" for path, _, name in suggestions)
+                else:
+                    source_text = "---"
+                table.add_row(
+                    font_name, 
+                    "[bold red]Missing[/]", 
+                    source_text, 
+                    str(char_count)
+                )
 
     console.print(table)
 
@@ -345,18 +1633,48 @@ def process_mkv(mkv_path, args, font_manager, temp_dir):
     if args.only_print_matchfont:
         console.print("[dim italic]Font match report only. Skipping remaining steps.[/]")
         log_to_file("[Report] Font match report only. Skipping remaining steps.")
-        return
+        return None
     if args.only_print_fonts:
         console.print("[dim italic]Report only. Skipping subsetting and muxing.[/]")
         log_to_file("[Report] Report only. Skipping remaining steps.")
-        return
+        return None
 
-    if not valid_fonts:
+    if not valid_fonts and reused_fonts and not (source and source.embedded_subtitles):
+        console.print("[dim]All matched fonts are already attached to the source MKV.[/]")
+    elif not valid_fonts:
         console.print("[yellow]Warning: No valid fonts to process.[/]")
-        return
+        return None
+
+    return ass_files, valid_fonts, missing_fonts
+
+def merge_subset_tasks(tasks):
+    # Tasks with the same face, family name and instance write the same file, e.g. aliases of
+    # one face when names are kept or stable. One task with the union charset replaces them.
+    merged = {}
+    for task in tasks:
+        key = (task[0], task[1], task[4], json.dumps(task[8], sort_keys=True))
+        if key in merged:
+            previous = merged[key]
+            merged[key] = previous[:2] + (set(previous[2]) | set(task[2]),) + previous[3:]
+        else:
+            merged[key] = task
+    return list(merged.values())
 
-    attachments = []
+def prepare_subset_tasks(valid_fonts, args, temp_dir, subset_cache=None, rename=True):
+    # Fonts for embedded ASS tracks keep their family names, since those tracks are not rewritten.
+    subset_tasks = []
     font_name_map = {}
+    for font_name, info, chars, styles in valid_fonts:
+        file_path, font_index, _ = info
+        random_name = obfuscated_name(file_path, font_index, chars) if rename else None
+        if rename:
+            font_name_map[font_name] = random_name
+        for location in instance_locations(file_path, font_index, styles, args):
+            subset_tasks.append((file_path, font_index, chars, temp_dir, random_name, args.disable_subset, subset_cache, args.subset_profile, location))
+    return merge_subset_tasks(subset_tasks), font_name_map
+
+def subset_episode_fonts(valid_fonts, args, temp_dir, subset_pool=None, subset_cache=None, stage=None, rename=True):
+    subset_tasks, font_name_map = prepare_subset_tasks(valid_fonts, args, temp_dir, subset_cache, rename)
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -364,65 +1682,741 @@ def process_mkv(mkv_path, args, font_manager, temp_dir):
         TaskProgressColumn(),
         console=console
     ) as progress:
-        task = progress.add_task("[green]Generating font subsets...", total=len(valid_fonts))
-        for font_name, info, chars in valid_fonts:
-            file_path, font_index, _ = info
-            random_name = generate_random_name()
-            font_name_map[font_name] = random_name
-            path, mime = subset_font_task(file_path, font_index, chars, temp_dir, random_name, args.disable_subset)
-            if path:
-                attachments.append((path, mime))
-            progress.advance(task)
+        task = progress.add_task("[green]Generating font subsets...", total=len(subset_tasks))
+        results = run_subset_tasks(subset_tasks, subset_pool, lambda: progress.advance(task), stage)
+    print_subset_sizes(subset_tasks, results)
+    return [(path, mime) for path, mime in results if path], font_name_map
 
+def prepare_mux(mkv_path, args, ass_files, attachments, font_name_map, temp_dir, source=None):
+    if source and source.embedded_subtitles:
+        ass_files = []
     if args.overwrite:
-        out_file = temp_dir / f"temp_{mkv_path.name}"
+        out_file = overwrite_temp_path(mkv_path)
     else:
-        out_dir = mkv_path.parent / "output"
+        out_dir = mkv_path.parent / OUTPUT_DIR_NAME
         out_dir.mkdir(exist_ok=True)
         out_file = out_dir / mkv_path.name
 
-    rewritten_ass_files = rewrite_ass_files(ass_files, font_name_map, temp_dir)
+    with ProfileStage("rewrite", mkv_path.name) as stage:
+        rewritten_ass_files = rewrite_ass_files(ass_files, font_name_map, temp_dir)
+        for ass in rewritten_ass_files:
+            if ass not in ass_files:
+                stage.add_output(ass)
 
-    cmd = [MKVMERGE_BIN, "-o", str(out_file), str(mkv_path)]
+    cmd = [MKVMERGE_BIN, "-o", str(out_file)]
+    if source and source.dropped_attachments:
+        cmd.extend(["--attachments", "!" + ",".join(str(i) for i in source.dropped_attachments)])
+    cmd.append(str(mkv_path))
     for ass in rewritten_ass_files:
         cmd.extend(["--language", "0:chi", str(ass)])
     for fpath, mime in attachments:
         cmd.extend(["--attachment-mime-type", mime, "--attach-file", fpath])
 
     log_to_file(f"[Mux] Start: output -> {out_file.absolute()}")
+    return cmd, out_file
+
+def overwrite_temp_path(mkv_path):
+    # Hidden sibling on the same filesystem as the source, so replacing it is a rename, never a copy.
+    return mkv_path.with_name(f".{mkv_path.name}{OVERWRITE_TEMP_SUFFIX}")
+
+def fsync_file(path):
+    with open(path, 'rb+') as f:
+        os.fsync(f.fileno())
+
+def fsync_dir(path):
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def reflink_file(src, dst):
+    # Copy-on-write clone (Btrfs, XFS, bcachefs). False when the filesystem cannot share extents.
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        with open(src, 'rb') as s, open(dst, 'xb') as d:
+            try:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+                return True
+            except OSError:
+                pass
+        os.unlink(dst)
+    except OSError:
+        pass
+    return False
+
+def backup_original(mkv_path, in_place=False):
+    backup = mkv_path.with_name(mkv_path.name + BACKUP_SUFFIX)
+    if backup.exists():
+        log_to_file(f"[Backup] Keeping existing {backup.name}")
+        return True
+    try:
+        # A remux replaces the source by rename, so the old file can stay linked under the
+        # backup name. In-place edits need an independent copy: a clone, or a full copy.
+        if not in_place:
+            try:
+                os.link(mkv_path, backup)
+                log_to_file(f"[Backup] Hard-linked {backup.name}")
+                return True
+            except OSError:
+                pass
+        if reflink_file(mkv_path, backup):
+            log_to_file(f"[Backup] Cloned {backup.name}")
+            return True
+        console.print(f"[yellow]Warning: Filesystem cannot clone {mkv_path.name}. Copying for backup...[/]")
+        shutil.copy2(mkv_path, backup)
+        log_to_file(f"[Backup] Copied {backup.name}")
+        return True
+    except OSError as e:
+        console.print(f"[bold red]Backup failed: {mkv_path.name} ({e})[/]")
+        log_to_file(f"[Error] Backup failed: {mkv_path} ({e})", "error")
+        return False
+
+def replace_original(mkv_path, args, out_file):
+    fsync_file(out_file)
+    if args.backup and not backup_original(mkv_path):
+        return False
+    os.replace(out_file, mkv_path)
+    fsync_dir(mkv_path.parent)
+    return True
+
+def finish_mux(mkv_path, args, out_file, returncode, stderr):
+    if returncode != 0:
+        console.print(f"[bold red]Mux failed: {mkv_path.name}[/]")
+        console.print(Panel(stderr.decode(), title="Error details", border_style="red"))
+        log_to_file(f"[Error] Mux failed: {stderr.decode()}", "error")
+        if args.overwrite:
+            out_file.unlink(missing_ok=True)
+        return False
+    log_to_file(f"[Mux] Completed successfully.")
+    if args.overwrite:
+        try:
+            replaced = replace_original(mkv_path, args, out_file)
+        except OSError as e:
+            console.print(f"[bold red]Overwrite failed: {mkv_path.name} ({e})[/]")
+            log_to_file(f"[Error] Overwrite failed: {mkv_path} ({e})", "error")
+            replaced = False
+        if not replaced:
+            out_file.unlink(missing_ok=True)
+            return False
+        console.print(f"[bold green]OK: Overwrote {mkv_path.name}[/]")
+    else:
+        console.print(f"[bold green]OK: Created output/{mkv_path.name}[/]")
+    return True
 
+def mux_episode(mkv_path, args, ass_files, attachments, font_name_map, temp_dir, source=None):
+    cmd, out_file = prepare_mux(mkv_path, args, ass_files, attachments, font_name_map, temp_dir, source)
     with console.status("[bold blue]Muxing with mkvmerge...", spinner="earth"):
+        with ProfileStage("mkvmerge", mkv_path.name) as stage:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            stage.add_output(out_file)
+        return finish_mux(mkv_path, args, out_file, result.returncode, result.stderr)
+
+def identify_mkv(mkv_path):
+    try:
+        result = subprocess.run([MKVMERGE_BIN, "-J", str(mkv_path)], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return json.loads(result.stdout)
+    except (subprocess.CalledProcessError, OSError, ValueError) as e:
+        log_to_file(f"[Warning] mkvmerge identification failed: {mkv_path} ({e})", "warning")
+        return None
+
+def embedded_ass_tracks(mkv_info):
+    return [
+        t for t in mkv_info.get("tracks", [])
+        if t.get("type") == "subtitles" and t.get("properties", {}).get("codec_id") in ASS_CODEC_IDS
+    ]
+
+def embedded_font_map(tracks):
+    # FontMap comments written by rewrite_ass_files survive in the ASS CodecPrivate header.
+    font_name_map = {}
+    for track in tracks:
+        data = track.get("properties", {}).get("codec_private_data")
+        if not data:
+            continue
         try:
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            log_to_file(f"[Mux] Completed successfully.")
-            if args.overwrite:
-                shutil.move(str(out_file), str(mkv_path))
-                console.print(f"[bold green]OK: Overwrote {mkv_path.name}[/]")
-            else:
-                console.print(f"[bold green]OK: Created output/{mkv_path.name}[/]")
-        except subprocess.CalledProcessError as e:
-            console.print(f"[bold red]Mux failed.[/]")
-            console.print(Panel(e.stderr.decode(), title="Error details", border_style="red"))
-            log_to_file(f"[Error] Mux failed: {e.stderr.decode()}", "error")
+            header = bytes.fromhex(data).decode('utf-8-sig', errors='ignore')
+        except ValueError:
+            continue
+        for line in header.splitlines():
+            m = FONTMAP_RE.match(line.strip())
+            if m:
+                font_name_map[m.group(1)] = m.group(2)
+    return font_name_map
 
-def main():
+def is_font_attachment(attachment):
+    return (attachment.get("content_type") in FONT_MIME_TYPES
+            or Path(attachment.get("file_name", "")).suffix.lower() in FONT_EXTENSIONS)
+
+def attachment_selector(attachment):
+    uid = attachment.get("properties", {}).get("uid")
+    return f"={uid}" if uid else str(attachment["id"])
+
+def run_mkvextract(mkv_path, tracks=(), attachments=()):
+    cmd = [MKVEXTRACT_BIN, str(mkv_path)]
+    if tracks:
+        cmd.append("tracks")
+        cmd.extend(f"{track_id}:{path}" for track_id, path in tracks)
+    if attachments:
+        cmd.append("attachments")
+        cmd.extend(f"{attachment_id}:{path}" for attachment_id, path in attachments)
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        log_to_file(f"[Warning] mkvextract failed for {mkv_path.name}: {(result.stdout + result.stderr).decode(errors='replace')}", "warning")
+        return False
+    return True
+
+class SourceMkv:
+    # What the source container already carries. Metadata comes from mkvmerge -J; font
+    # attachments and embedded ASS tracks are extracted with mkvextract only when needed.
+    def __init__(self, mkv_path, mkv_info, temp_dir):
+        self.mkv_path = mkv_path
+        self.info = mkv_info
+        self.extract_dir = Path(temp_dir) / "source" / mkv_path.stem
+        self.embedded_subtitles = False
+        self.dropped_attachments = []
+        self._fonts = None
+
+    def extract_embedded_ass(self):
+        tracks = embedded_ass_tracks(self.info)
+        if not tracks:
+            return []
+        self.extract_dir.mkdir(parents=True, exist_ok=True)
+        targets = [(t["id"], self.extract_dir / f"{self.mkv_path.stem}.track{t['id']}.ass") for t in tracks]
+        if not run_mkvextract(self.mkv_path, tracks=targets):
+            return []
+        self.embedded_subtitles = True
+        return [path for _, path in targets]
+
+    def _load_fonts(self):
+        self._fonts = {}
+        fonts = [a for a in self.info.get("attachments", []) if is_font_attachment(a)]
+        if not fonts:
+            return
+        self.extract_dir.mkdir(parents=True, exist_ok=True)
+        targets = [(a["id"], self.extract_dir / f"attachment{a['id']}{Path(a.get('file_name', '')).suffix}") for a in fonts]
+        if not run_mkvextract(self.mkv_path, attachments=targets):
+            return
+        for attachment, (_, path) in zip(fonts, targets):
+            records, coverage = read_font_file(str(path))
+            for index, name in records:
+                key = normalize_font_key(name)
+                for k in {key, key.replace(" ", "")}:
+                    self._fonts.setdefault(k, []).append((attachment, coverage.get(index)))
+        log_to_file(f"[Source] {len(fonts)} font attachments in {self.mkv_path.name}")
+
+    def find_attachment(self, font_name, chars):
+        # Returns (attachment, uncovered chars) for the best attached face of this family, or None.
+        if self._fonts is None:
+            self._load_fonts()
+        best = None
+        codepoints = text_codepoints(chars)
+        for attachment, ranges in self._fonts.get(normalize_font_key(font_name), []):
+            # An attachment whose cmap could not be read covers nothing.
+            missing = "".join(chr(cp) for cp in missing_codepoints(ranges, codepoints)) if ranges is not None else "".join(map(chr, codepoints))
+            if best is None or len(missing) < len(best[1]):
+                best = (attachment, missing)
+        return best
+
+    def drop_attachment(self, attachment):
+        if attachment["id"] not in self.dropped_attachments:
+            self.dropped_attachments.append(attachment["id"])
+
+def open_source_mkv(mkv_path, args, temp_dir):
+    # In-place attachment updates replace the fonts of a previous run, so nothing is reused there.
+    if args.no_reuse_attachments or (args.attachments_only and args.overwrite) or not Path(MKVEXTRACT_BIN).exists():
+        return None
+    mkv_info = identify_mkv(mkv_path)
+    return SourceMkv(mkv_path, mkv_info, temp_dir) if mkv_info else None
+
+def ass_signature(ass_path):
+    # Style and Dialogue lines with font names blanked. Rewriting only renames fonts, so an
+    # embedded track muxed from the same external file has the same signature.
+    styles = []
+    events = []
+    with open(ass_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('Style:'):
+                parts = line.split(',')
+                if len(parts) > 2:
+                    parts[1] = ''
+                styles.append(",".join(parts))
+            elif line.startswith('Dialogue:'):
+                events.append(ASS_FN_RE.sub(r'\\fn', line))
+    return sorted(styles), sorted(events)
+
+def embedded_tracks_current(mkv_path, tracks, ass_files, temp_dir):
+    # The kept tracks must still be the external ASS, or new subsets could drop glyphs they use.
+    if not Path(MKVEXTRACT_BIN).exists():
+        return False
+    extract_dir = Path(temp_dir) / "propedit" / mkv_path.stem
+    extract_dir.mkdir(parents=True, exist_ok=True)
+    targets = [(t["id"], extract_dir / f"track{t['id']}.ass") for t in tracks]
+    if not run_mkvextract(mkv_path, tracks=targets):
+        return False
+    embedded = [ass_signature(path) for _, path in targets]
+    return all(ass_signature(ass) in embedded for ass in ass_files)
+
+def update_attachments_in_place(mkv_path, args, ass_files, valid_fonts, missing_fonts, temp_dir, subset_pool=None, subset_cache=None):
+    # Rewrites only the font attachments with mkvpropedit. Returns None when the MKV
+    # does not already carry the subtitle tracks and the episode must be remuxed.
+    if missing_fonts:
+        # Attachments of fonts the library lacks cannot be told apart from stale ones; a remux
+        # rebuilds the attachment list from what is actually available.
+        log_to_file(f"[Propedit] Missing fonts {missing_fonts} for {mkv_path.name}. Remuxing instead.")
+        return None
+    mkv_info = identify_mkv(mkv_path)
+    if not mkv_info:
+        return None
+    tracks = embedded_ass_tracks(mkv_info)
+    if len(tracks) < len(ass_files):
+        log_to_file(f"[Propedit] {mkv_path.name} has {len(tracks)} ASS tracks for {len(ass_files)} files. Remuxing instead.")
+        return None
+    if not embedded_tracks_current(mkv_path, tracks, ass_files, temp_dir):
+        log_to_file(f"[Propedit] Embedded ASS tracks of {mkv_path.name} differ from the external files. Remuxing instead.")
+        return None
+    # Embedded tracks reference the family names of the previous run; keep them.
+    embedded_map = {normalize_font_key(k): v for k, v in embedded_font_map(tracks).items()}
+    if embedded_map:
+        unmapped = [font_name for font_name, _, _, _ in valid_fonts if normalize_font_key(font_name) not in embedded_map]
+        if unmapped:
+            log_to_file(f"[Propedit] Embedded tracks have no FontMap for {unmapped}. Remuxing instead.")
+            return None
+
+    subset_tasks = []
+    for font_name, info, chars, styles in valid_fonts:
+        file_path, font_index, _ = info
+        family_name = embedded_map.get(normalize_font_key(font_name))
+        for location in instance_locations(file_path, font_index, styles, args):
+            subset_tasks.append((file_path, font_index, chars, temp_dir, family_name, args.disable_subset, subset_cache, args.subset_profile, location))
+    subset_tasks = merge_subset_tasks(subset_tasks)
+    with ProfileStage("subset", mkv_path.name) as stage:
+        results = run_subset_tasks(subset_tasks, subset_pool, stage=stage)
+        attachments = [(path, mime) for path, mime in results if path]
+        for path, _ in attachments:
+            stage.add_output(path)
+    print_subset_sizes(subset_tasks, results)
+
+    existing = {a.get("file_name"): a for a in mkv_info.get("attachments", []) if is_font_attachment(a)}
+    # Only subsets written by an earlier run (<stem>_<family> or <stem>_subset) are deleted.
+    suffixes = tuple(f"_{family}" for family in {*embedded_map.values(), "subset"})
+    cmd = [MKVPROPEDIT_BIN, str(mkv_path)]
+    for path, mime in attachments:
+        old = existing.pop(Path(path).name, None)
+        if old:
+            cmd.extend(["--attachment-mime-type", mime, "--replace-attachment", f"{attachment_selector(old)}:{path}"])
+        else:
+            cmd.extend(["--attachment-name", Path(path).name, "--attachment-mime-type", mime, "--add-attachment", path])
+    for name, old in existing.items():
+        if Path(name).stem.endswith(suffixes):
+            cmd.extend(["--delete-attachment", attachment_selector(old)])
+        else:
+            log_to_file(f"[Propedit] Keeping attachment not written by this tool: {name}")
+
+    if args.backup and not backup_original(mkv_path, in_place=True):
+        return False
+    log_to_file(f"[Propedit] Start: {' '.join(cmd[1:])}")
+    with ProfileStage("mkvpropedit", mkv_path.name):
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            log_to_file(f"[Warning] mkvpropedit could not run ({e}). Remuxing instead.", "warning")
+            return None
+    if result.returncode != 0:
+        console.print(f"[bold red]Attachment update failed: {mkv_path.name}[/]")
+        console.print(Panel((result.stdout + result.stderr).decode(errors='replace'), title="Error details", border_style="red"))
+        log_to_file(f"[Error] mkvpropedit failed: {(result.stdout + result.stderr).decode(errors='replace')}", "error")
+    else:
+        log_to_file(f"[Propedit] Completed successfully.")
+        console.print(f"[bold green]OK: Updated attachments in {mkv_path.name}[/]")
+    return result.returncode == 0
+
+def episode_output_path(mkv_path, args):
+    return mkv_path if args.overwrite else mkv_path.parent / OUTPUT_DIR_NAME / mkv_path.name
+
+def stat_fingerprint(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+class BuildManifest:
+    # Fingerprints of finished episodes, used by --incremental to skip unchanged inputs.
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.episodes = {}
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            if data.get("version") == MANIFEST_VERSION:
+                self.episodes = data.get("episodes", {})
+        except (OSError, ValueError):
+            pass
+
+    def _fingerprint(self, args, ass_files):
+        return {
+            "options": {name: getattr(args, name) for name in MANIFEST_OPTIONS},
+            "ass": {ass.name: file_digest(ass) for ass in sorted(ass_files)},
+        }
+
+    def _fonts_current(self, fonts, font_manager):
+        # The face that was muxed is compared by its own stat; matching depends on the characters,
+        # so a fresh lookup by name alone could pick another copy.
+        for font_name, font in fonts.items():
+            if font is None:
+                if font_manager.find_font(font_name):
+                    return False
+            elif stat_fingerprint(font[0]) != font[2:]:
+                return False
+        return True
+
+    def is_current(self, mkv_path, args, font_manager):
+        entry = self.episodes.get(str(mkv_path.resolve()))
+        if not entry:
+            return False
+        try:
+            output = episode_output_path(mkv_path, args)
+            if stat_fingerprint(output) != entry["output"]:
+                return False
+            if not args.overwrite and stat_fingerprint(mkv_path) != entry["source"]:
+                return False
+            fingerprint = self._fingerprint(args, find_episode_ass_files(mkv_path))
+            if not all(fingerprint[k] == entry[k] for k in fingerprint):
+                return False
+            return self._fonts_current(entry["fonts"], font_manager)
+        except (OSError, KeyError):
+            return False
+
+    def record(self, mkv_path, args, fonts):
+        # fonts: {ASS font name: (path, face index) that was muxed, or None when missing}.
+        # External ASS files are fingerprinted as in is_current; subtitles taken from embedded
+        # tracks live in the source MKV, which is covered by its own stat.
+        try:
+            entry = self._fingerprint(args, find_episode_ass_files(mkv_path))
+            entry["fonts"] = {name: [*font, *stat_fingerprint(font[0])] if font else None
+                              for name, font in sorted(fonts.items())}
+            entry["source"] = stat_fingerprint(mkv_path)
+            entry["output"] = stat_fingerprint(episode_output_path(mkv_path, args))
+        except OSError as e:
+            log_to_file(f"[Warning] Failed to fingerprint {mkv_path.name}: {e}", "warning")
+            return
+        with self.lock:
+            self.episodes[str(mkv_path.resolve())] = entry
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "episodes": self.episodes},
+                                      ensure_ascii=False, indent=1), encoding='utf-8')
+            os.replace(tmp, self.path)
+        log_to_file(f"[Manifest] Recorded {mkv_path.name}")
+
+def manifest_fonts(valid_fonts, missing_fonts):
+    fonts = {font_name: info[:2] for font_name, info, _, _ in valid_fonts}
+    fonts.update((font_name, None) for font_name in missing_fonts)
+    return fonts
+
+def find_mkvs(roots, recursive=False):
+    mkvs = []
+    for root in roots:
+        if not recursive:
+            mkvs.extend(root.glob("*.mkv"))
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d not in (OUTPUT_DIR_NAME, TEMP_DIR_NAME))
+            mkvs.extend(Path(dirpath) / f for f in sorted(filenames) if f.lower().endswith(".mkv"))
+    return list(dict.fromkeys(mkvs))
+
+def folder_temp_dir(folder):
+    temp_dir = folder / TEMP_DIR_NAME
+    temp_dir.mkdir(exist_ok=True)
+    return temp_dir
+
+def folder_manifest(manifests, mkv_path):
+    # One manifest per episode folder, opened on first use. None when --incremental is off.
+    if manifests is None:
+        return None
+    if mkv_path.parent not in manifests:
+        manifests[mkv_path.parent] = BuildManifest(mkv_path.parent / MANIFEST_NAME)
+    return manifests[mkv_path.parent]
+
+def print_batch_summary(statuses):
+    labels = {True: "OK", False: "Failed", None: "Skipped", "current": "Up to date"}
+    folders = {}
+    for mkv, status in statuses.items():
+        folders.setdefault(mkv.parent, Counter())[labels[status]] += 1
+    table = Table(title="Batch Summary", box=box.ROUNDED)
+    table.add_column("Folder", style="cyan")
+    table.add_column("Episodes", justify="right")
+    for label, style in (("OK", "green"), ("Failed", "red"), ("Skipped", "yellow"), ("Up to date", "dim")):
+        table.add_column(label, justify="right", style=style)
+    for folder, counts in folders.items():
+        table.add_row(str(folder), str(sum(counts.values())),
+                      *(str(counts[label]) for label in ("OK", "Failed", "Skipped", "Up to date")))
+    console.print(table)
+    log_to_file(f"[Summary] {len(statuses)} episodes in {len(folders)} folders: "
+                f"{dict(sum(folders.values(), Counter()))}")
+
+def process_mkv(mkv_path, args, font_manager, temp_dir, subset_pool=None, subset_cache=None, batch_plan=None, manifest=None):
+    needed_fonts = batch_plan.needed_fonts.get(mkv_path) if batch_plan else None
+    font_styles = batch_plan.font_styles.get(mkv_path) if batch_plan else None
+    source = open_source_mkv(mkv_path, args, temp_dir)
+    analysis = analyze_episode(mkv_path, args, font_manager, needed_fonts, source=source, font_styles=font_styles)
+    if not analysis:
+        return None
+    ass_files, valid_fonts, missing_fonts = analysis
+    used_fonts = manifest_fonts(valid_fonts, missing_fonts)
+
+    if args.attachments_only and args.overwrite and not batch_plan:
+        updated = update_attachments_in_place(mkv_path, args, ass_files, valid_fonts, missing_fonts, temp_dir, subset_pool, subset_cache)
+        if updated is not None:
+            if updated and manifest:
+                manifest.record(mkv_path, args, used_fonts)
+            return updated
+
+    embedded = source is not None and source.embedded_subtitles
+    if batch_plan and not embedded:
+        attachments, font_name_map = batch_plan.episode_fonts(valid_fonts)
+    else:
+        with ProfileStage("subset", mkv_path.name) as stage:
+            attachments, font_name_map = subset_episode_fonts(valid_fonts, args, temp_dir, subset_pool, subset_cache,
+                                                              stage, rename=not embedded)
+            for path, _ in attachments:
+                stage.add_output(path)
+
+    ok = mux_episode(mkv_path, args, ass_files, attachments, font_name_map, temp_dir, source)
+    if ok and manifest:
+        manifest.record(mkv_path, args, used_fonts)
+    return ok
+
+async def run_pipeline(mkvs, args, font_manager, subset_pool=None, subset_cache=None, batch_plan=None, manifests=None):
+    # Analysis -> subsetting -> mkvmerge, connected by bounded queues so the stages overlap.
+    # Returns the process_mkv-style result of every episode.
+    loop = asyncio.get_running_loop()
+    results_by_mkv = {}
+    analyzed = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    subsetted = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    mux_jobs = max(1, args.mux_jobs)
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TaskProgressColumn(),
+        console=console
+    ) as progress:
+        analyze_task = progress.add_task("[cyan]Analysis", total=len(mkvs))
+        subset_task = progress.add_task("[green]Subsetting", total=len(mkvs))
+        mux_task = progress.add_task("[blue]Muxing", total=len(mkvs))
+
+        async def analysis_stage():
+            for mkv in mkvs:
+                needed_fonts = batch_plan.needed_fonts.get(mkv) if batch_plan else None
+                font_styles = batch_plan.font_styles.get(mkv) if batch_plan else None
+                source = await asyncio.to_thread(open_source_mkv, mkv, args, folder_temp_dir(mkv.parent))
+                analysis = await asyncio.to_thread(analyze_episode, mkv, args, font_manager, needed_fonts, False, source, font_styles)
+                progress.advance(analyze_task)
+                if analysis:
+                    await analyzed.put((mkv, source, *analysis))
+                else:
+                    results_by_mkv[mkv] = None
+                    progress.advance(subset_task)
+                    progress.advance(mux_task)
+            await analyzed.put(None)
+
+        async def subset_stage():
+            while (item := await analyzed.get()) is not None:
+                mkv, source, ass_files, valid_fonts, missing_fonts = item
+                used_fonts = manifest_fonts(valid_fonts, missing_fonts)
+                embedded = source is not None and source.embedded_subtitles
+                temp_dir = folder_temp_dir(mkv.parent)
+                manifest = folder_manifest(manifests, mkv)
+                if args.attachments_only and args.overwrite and not batch_plan:
+                    updated = await asyncio.to_thread(
+                        update_attachments_in_place, mkv, args, ass_files, valid_fonts, missing_fonts, temp_dir, subset_pool, subset_cache
+                    )
+                    if updated is not None:
+                        if updated and manifest:
+                            await asyncio.to_thread(manifest.record, mkv, args, used_fonts)
+                        results_by_mkv[mkv] = updated
+                        progress.advance(subset_task)
+                        progress.advance(mux_task)
+                        continue
+                if batch_plan and not embedded:
+                    attachments, font_name_map = batch_plan.episode_fonts(valid_fonts)
+                else:
+                    subset_tasks, font_name_map = prepare_subset_tasks(valid_fonts, args, temp_dir, subset_cache, not embedded)
+                    with ProfileStage("subset", mkv.name, lane="pipeline subset") as stage:
+                        if subset_pool:
+                            timed = await asyncio.gather(
+                                *(loop.run_in_executor(subset_pool, cpu_timed_call, subset_font_task, *t) for t in subset_tasks)
+                            )
+                            results = [result for result, _, _ in timed]
+                            stage.add_cpu(sum(cpu for _, cpu, _ in timed))
+                            for _, _, peak in timed:
+                                stage.add_worker_rss(peak)
+                        else:
+                            results, cpu, _ = await asyncio.to_thread(cpu_timed_call, run_subset_tasks, subset_tasks)
+                            stage.add_cpu(cpu)
+                        print_subset_sizes(subset_tasks, results)
+                        attachments = [(path, mime) for path, mime in results if path]
+                        for path, _ in attachments:
+                            stage.add_output(path)
+                progress.advance(subset_task)
+                await subsetted.put((mkv, source, ass_files, attachments, font_name_map, used_fonts))
+            for _ in range(mux_jobs):
+                await subsetted.put(None)
+
+        async def mux_worker(worker_id):
+            while (item := await subsetted.get()) is not None:
+                mkv, source, ass_files, attachments, font_name_map, used_fonts = item
+                cmd, out_file = await asyncio.to_thread(
+                    prepare_mux, mkv, args, ass_files, attachments, font_name_map, folder_temp_dir(mkv.parent), source
+                )
+                with ProfileStage("mkvmerge", mkv.name, lane=f"pipeline mkvmerge {worker_id}") as stage:
+                    proc = await asyncio.create_subprocess_exec(
+                        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                    )
+                    _, stderr = await proc.communicate()
+                    stage.add_output(out_file)
+                ok = await asyncio.to_thread(finish_mux, mkv, args, out_file, proc.returncode, stderr)
+                manifest = folder_manifest(manifests, mkv)
+                if ok and manifest:
+                    await asyncio.to_thread(manifest.record, mkv, args, used_fonts)
+                results_by_mkv[mkv] = ok
+                progress.advance(mux_task)
+
+        await asyncio.gather(analysis_stage(), subset_stage(), *(mux_worker(i + 1) for i in range(mux_jobs)))
+    return results_by_mkv
+
+def episode_fingerprint(mkv_path):
+    try:
+        return stat_fingerprint(mkv_path), [(ass.name, *stat_fingerprint(ass)) for ass in sorted(find_episode_ass_files(mkv_path))]
+    except OSError:
+        return None
+
+class WatchWakeup:
+    # watchdog event handler; any change under a watched directory wakes the loop early.
+    def __init__(self, wake=None):
+        self.event = threading.Event()
+        self.wake = wake
+
+    def dispatch(self, event):
+        self.event.set()
+        if self.wake:
+            self.wake.set()
+
+def watch_directories(roots, args, font_manager, subset_pool=None, subset_cache=None, manifests=None, statuses=None):
+    # Episodes already present were handled by the initial run; remember their current state.
+    done = {mkv: episode_fingerprint(mkv) for mkv in find_mkvs(roots, args.recursive)}
+    pending = {}
+    intake = WatchWakeup()
+    fonts = WatchWakeup(wake=intake.event)
+    observer = None
+    if Observer:
+        observer = Observer()
+        for root in roots:
+            observer.schedule(intake, str(root), recursive=args.recursive)
+        for font_dir in font_manager.target_dirs():
+            if Path(font_dir).exists():
+                observer.schedule(fonts, str(font_dir), recursive=True)
+        observer.start()
+    mode = "filesystem events" if observer else f"polling every {args.watch_interval}s"
+    watched = ", ".join(str(root) for root in roots)
+    console.print(f"[bold cyan]Watching {watched} ({mode}). Press Ctrl+C to stop.[/]")
+    log_to_file(f"[Watch] Watching {watched} ({mode})")
+
+    last_font_check = time.monotonic()
+    try:
+        while True:
+            # Events cut the wait short; the timeout keeps Ctrl+C responsive on Windows.
+            intake.event.wait(args.watch_interval)
+            intake.event.clear()
+
+            now = time.monotonic()
+            if fonts.event.is_set() or (not observer and now - last_font_check >= WATCH_FONT_POLL_SECONDS):
+                fonts.event.clear()
+                last_font_check = now
+                if font_manager.refresh():
+                    log_to_file("[Watch] Font directories changed. Font index refreshed.")
+
+            ready = []
+            mkvs = find_mkvs(roots, args.recursive)
+            for mkv in mkvs:
+                fingerprint = episode_fingerprint(mkv)
+                if fingerprint is None or done.get(mkv) == fingerprint:
+                    pending.pop(mkv, None)
+                    continue
+                # Copies in progress keep changing size/mtime; wait until they hold still.
+                if mkv not in pending or pending[mkv][0] != fingerprint:
+                    pending[mkv] = (fingerprint, now)
+                elif now - pending[mkv][1] >= args.watch_settle:
+                    ready.append(mkv)
+            for mkv in pending.keys() - set(mkvs):
+                del pending[mkv]
+
+            for mkv in ready:
+                del pending[mkv]
+                log_to_file(f"[Watch] New episode: {mkv.name}")
+                result = process_mkv(mkv, args, font_manager, folder_temp_dir(mkv.parent), subset_pool, subset_cache,
+                                     manifest=folder_manifest(manifests, mkv))
+                if statuses is not None:
+                    statuses[mkv] = result
+                done[mkv] = episode_fingerprint(mkv)
+    except KeyboardInterrupt:
+        console.print("[dim]Watch stopped.[/]")
+        log_to_file("[Watch] Stopped.")
+    finally:
+        if observer:
+            observer.stop()
+            observer.join()
+
+def build_arg_parser():
     parser = argparse.ArgumentParser(description="MKV font subset + mux tool")
-    parser.add_argument("dir", help="Directory containing videos and subtitles")
+    parser.add_argument("dirs", nargs="+", metavar="dir", help="Directories containing videos and subtitles")
+    parser.add_argument("--recursive", action="store_true", help="Also process episodes in subdirectories")
     parser.add_argument("--force-match", action="store_true", help="Force exact font name matching")
     parser.add_argument("--font-directory", help="Custom font scan directory")
+    parser.add_argument("--font-cache", help="Font index cache file (default: user cache directory)")
+    parser.add_argument("--no-font-cache", action="store_true", help="Rescan all fonts without the index cache")
+    parser.add_argument("--scan-jobs", type=int, default=1, help="Worker processes for reading font files")
+    parser.add_argument("--subset-profile", choices=list(SUBSET_PROFILES), default=DEFAULT_SUBSET_PROFILE,
+                        help="Subset size profile: minimal, balanced or full (default: full)")
     parser.add_argument("--disable-subset", action="store_true", help="Disable font subsetting")
+    parser.add_argument("--no-reuse-attachments", action="store_true", help="Ignore fonts and ASS tracks already in the source MKV")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes for font subsetting")
+    parser.add_argument("--batch-plan", action="store_true", help="Subset each font once for the whole directory")
+    parser.add_argument("--incremental", action="store_true", help=f"Skip episodes whose inputs match the last successful build ({MANIFEST_NAME})")
+    parser.add_argument("--pipeline", action="store_true", help="Overlap analysis, subsetting and muxing across episodes")
+    parser.add_argument("--mux-jobs", type=int, default=2, help="Concurrent mkvmerge processes in pipeline mode")
+    parser.add_argument("--watch", action="store_true", help="Keep running and process new episodes as they appear")
+    parser.add_argument("--watch-interval", type=float, default=2, help="Seconds between directory checks in watch mode")
+    parser.add_argument("--watch-settle", type=float, default=5, help="Seconds a new episode must stay unchanged before processing")
+    parser.add_argument("--subset-cache", help="Subset cache directory (default: user cache directory)")
+    parser.add_argument("--subset-cache-size", type=int, default=2048, help="Subset cache size limit in MB")
+    parser.add_argument("--no-subset-cache", action="store_true", help="Always rebuild font subsets")
+    parser.add_argument("--stable-names", action="store_true", help="Derive obfuscated font names from the font and its characters (reproducible output)")
+    parser.add_argument("--name-key", help=f"Key file for --stable-names (default: {NAME_KEY_FILE} in the user cache directory)")
     parser.add_argument("--save-log", action="store_true", help="Save log to mux.log")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_TRACE_NAME, metavar="TRACE",
+                        help=f"Profile each stage and write a Chrome trace (default: {PROFILE_TRACE_NAME} in the directory)")
     parser.add_argument("--overwrite", action="store_true", help="Overwrite source MKV")
+    parser.add_argument("--backup", action="store_true", help=f"With --overwrite, keep the original as <name>{BACKUP_SUFFIX} (hard link or reflink clone where possible)")
+    parser.add_argument("--attachments-only", action="store_true", help="With --overwrite, update font attachments in place via mkvpropedit when the MKV already has the ASS tracks")
     parser.add_argument("--remove-temp", action="store_true", help="Remove temporary font files")
     parser.add_argument("--only-print-fonts", action="store_true", help="Report font usage only")
     parser.add_argument("--only-print-matchfont", action="store_true", help="Report font matching only")
+    return parser
 
-    args = parser.parse_args()
+def main():
+    global profiler, stable_namer
+    args = build_arg_parser().parse_args()
     
-    work_dir = Path(args.dir.strip('"').strip("'"))
-    if not work_dir.exists():
-        console.print(f"[bold red]Error: directory not found {work_dir}[/]")
-        return
+    roots = list(dict.fromkeys(Path(d.strip('"').strip("'")) for d in args.dirs))
+    for root in roots:
+        if not root.exists():
+            console.print(f"[bold red]Error: directory not found {root}[/]")
+            return
+    # The log, the profile trace and shared batch subsets go to the first directory.
+    work_dir = roots[0]
 
     log_file = work_dir / "mux.log" if args.save_log else None
     setup_file_logger(log_file)
@@ -431,6 +2425,17 @@ def main():
         console.print(f"[bold red]Error: mkvmerge not found at {MKVMERGE_BIN}[/]")
         return
 
+    if not args.no_reuse_attachments and not Path(MKVEXTRACT_BIN).exists():
+        console.print(f"[yellow]Warning: mkvextract not found at {MKVEXTRACT_BIN}. Fonts attached to source MKVs are not reused.[/]")
+
+    if args.attachments_only and not args.overwrite:
+        console.print("[yellow]Warning: --attachments-only edits files in place and requires --overwrite. Ignored.[/]")
+    elif args.attachments_only and not Path(MKVPROPEDIT_BIN).exists():
+        console.print(f"[yellow]Warning: mkvpropedit not found at {MKVPROPEDIT_BIN}. Remuxing instead of --attachments-only.[/]")
+        args.attachments_only = False
+    if args.backup and not args.overwrite:
+        console.print("[yellow]Warning: --backup only applies with --overwrite. Ignored.[/]")
+
     # Dynamic title
     if args.only_print_matchfont:
         title_mode = "[bold cyan]Font match mode (report only)[/]"
@@ -438,27 +2443,102 @@ def main():
         title_mode = "[bold yellow]Report mode (report only)[/]"
     else:
         title_mode = "[bold green]Mux mode[/]"
-    console.print(Panel.fit(f"[bold white]MKV Font Mux Tool[/]\n[dim]Directory: {work_dir}[/]\n{title_mode}", style="blue"))
+    directories = ", ".join(str(root) for root in roots) + (" (recursive)" if args.recursive else "")
+    console.print(Panel.fit(f"[bold white]MKV Font Mux Tool[/]\n[dim]Directory: {directories}[/]\n{title_mode}", style="blue"))
+
+    if args.profile:
+        profiler = RunProfiler()
 
     font_dirs = [args.font_directory] if args.font_directory else None
-    fm = FontManager(search_dirs=font_dirs, smart_match=not args.force_match)
+    if args.no_font_cache:
+        font_cache = None
+    else:
+        font_cache = Path(args.font_cache) if args.font_cache else get_cache_dir() / "font_index.db"
+    with ProfileStage("font_scan"):
+        fm = FontManager(search_dirs=font_dirs, smart_match=not args.force_match, cache_path=font_cache,
+                         scan_jobs=args.scan_jobs)
 
-    temp_dir = work_dir / "temp_fonts_mux"
-    temp_dir.mkdir(exist_ok=True)
+    subset_cache = None
+    if not args.no_subset_cache and not args.disable_subset:
+        cache_dir = Path(args.subset_cache) if args.subset_cache else get_cache_dir() / "subsets"
+        try:
+            subset_cache = SubsetCache(cache_dir, args.subset_cache_size * 1024 * 1024)
+        except (sqlite3.Error, OSError) as e:
+            log_to_file(f"[Warning] Subset cache unavailable: {cache_dir} ({e})", "warning")
 
+    if args.stable_names:
+        key_path = Path(args.name_key) if args.name_key else get_cache_dir() / NAME_KEY_FILE
+        try:
+            stable_namer = StableNamer(load_name_key(key_path))
+        except OSError as e:
+            console.print(f"[yellow]Warning: Font name key unavailable ({e}). Using random names.[/]")
+            log_to_file(f"[Warning] Font name key unavailable: {key_path} ({e})", "warning")
+
+    subset_pool = None
+    if args.jobs > 1:
+        subset_pool = ProcessPoolExecutor(args.jobs, initializer=init_worker, initargs=(current_log_path(),))
+
+    report_only = args.only_print_fonts or args.only_print_matchfont
+    statuses = {}
     try:
-        mkvs = list(work_dir.glob("*.mkv"))
-        if not mkvs:
+        # All folders feed one episode list, sharing the font index, subset pool and caches.
+        mkvs = find_mkvs(roots, args.recursive)
+        if not mkvs and not args.watch:
             console.print("[red]No MKV files found in the directory.[/]")
-            
-        for mkv in mkvs:
-            process_mkv(mkv, args, fm, temp_dir)
+
+        manifests = None
+        if args.incremental and not report_only:
+            manifests = {}
+            pending = []
+            for mkv in mkvs:
+                if folder_manifest(manifests, mkv).is_current(mkv, args, fm):
+                    console.print(f"[dim]Up to date, skipped: {mkv.name}[/]")
+                    log_to_file(f"[Manifest] Up to date, skipped: {mkv.name}")
+                    statuses[mkv] = "current"
+                else:
+                    pending.append(mkv)
+            mkvs = pending
+
+        batch_plan = None
+        if args.batch_plan and mkvs and not report_only:
+            batch_plan = BatchPlan()
+            batch_plan.build(mkvs, args, fm, folder_temp_dir(work_dir), subset_pool, subset_cache)
+
+        if args.pipeline and mkvs:
+            statuses.update(asyncio.run(run_pipeline(mkvs, args, fm, subset_pool, subset_cache, batch_plan, manifests)))
+        else:
+            for mkv in mkvs:
+                statuses[mkv] = process_mkv(mkv, args, fm, folder_temp_dir(mkv.parent), subset_pool, subset_cache,
+                                            batch_plan, folder_manifest(manifests, mkv))
+
+        if args.watch:
+            watch_directories(roots, args, fm, subset_pool, subset_cache, manifests, statuses)
             
     finally:
+        if subset_pool:
+            subset_pool.shutdown()
+        if statuses and not report_only:
+            print_batch_summary(statuses)
         log_to_file(f"\n[Summary] Task finished.")
-        if args.remove_temp and temp_dir.exists():
-            shutil.rmtree(temp_dir)
-            console.print("[dim]Temporary files removed.[/]")
+        if args.remove_temp:
+            failed = []
+            for folder in dict.fromkeys([work_dir] + [mkv.parent for mkv in statuses]):
+                if (folder / TEMP_DIR_NAME).exists():
+                    try:
+                        shutil.rmtree(folder / TEMP_DIR_NAME)
+                    except OSError as e:
+                        failed.append(folder / TEMP_DIR_NAME)
+                        log_to_file(f"[Warning] Failed to remove {folder / TEMP_DIR_NAME}: {e}", "warning")
+            if failed:
+                console.print(f"[yellow]Warning: could not remove temporary files in: {', '.join(str(f) for f in failed)}[/]")
+            else:
+                console.print("[dim]Temporary files removed.[/]")
+        if profiler:
+            trace_path = work_dir / args.profile
+            profiler.print_summary()
+            profiler.write_trace(trace_path)
+            console.print(f"[green][OK][/] Profile trace written: {trace_path}")
+            log_to_file(f"[Profile] Trace written: {trace_path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+
+'''
+Copyright (C) 2026 gkouen
+
+This work is free. You can redistribute it and/or modify it under the
+terms of the Do What The Fuck You Want To Public License, Version 2,
+as published by Sam Hocevar. See http://www.wtfpl.net/ for more details.
+'''
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from fontTools.ttLib import TTFont
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+import mkvFontmux
+
+console = Console()
+
+CJK_RANGES = [(0x4E00, 0x9FFF), (0x3040, 0x309F), (0x30A0, 0x30FF)]
+DEFAULT_SOURCE_HINTS = ["dejavu", "noto", "sourcehan", "source han", "liberation"]
+STAGES = ["scan_cold", "scan_warm", "ass_parse", "subset", "rewrite", "end_to_end"]
+
+STAND_IN_MKVMERGE = '''import shutil, sys
+# Options mkvFontmux passes with a value; the first other argument is the source MKV.
+VALUE_OPTIONS = {"-o", "--attachments", "--language", "--attachment-mime-type", "--attachment-name", "--attach-file"}
+args = sys.argv[1:]
+out, source, attached = None, None, []
+i = 0
+while i < len(args):
+    if args[i] in VALUE_OPTIONS:
+        if args[i] == "-o":
+            out = args[i + 1]
+        elif args[i] == "--attach-file":
+            attached.append(args[i + 1])
+        i += 2
+        continue
+    if source is None and not args[i].startswith("-"):
+        source = args[i]
+    i += 1
+with open(out, "wb") as dst:
+    for src in [source] + attached:
+        with open(src, "rb") as f:
+            shutil.copyfileobj(f, dst)
+'''
+
+def random_cjk_text(rng, length):
+    chars = []
+    for _ in range(length):
+        lo, hi = rng.choice(CJK_RANGES)
+        chars.append(chr(rng.randint(lo, hi)))
+    return "".join(chars)
+
+def generate_ass(path, font_names, styles, lines, seed=0):
+    # Synthetic typesetting-heavy script: many styles, \fn switches, \t/\move animation
+    # tags and vector drawings mixed with CJK and Latin text.
+    rng = random.Random(seed)
+    style_names = [f"Style{i:03d}" for i in range(styles)]
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        f.write("[Script Info]\nTitle: mkvFontmux benchmark\nScriptType: v4.00+\n\n")
+        f.write("[V4+ Styles]\nFormat: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+                "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+                "Alignment, MarginL, MarginR, MarginV, Encoding\n")
+        for i, name in enumerate(style_names):
+            font = font_names[i % len(font_names)]
+            f.write(f"Style: {name},{font},48,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,"
+                    f"{rng.choice([0, -1])},0,0,0,100,100,0,0,1,2,2,2,10,10,10,1\n")
+        f.write("\n[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
+        for i in range(lines):
+            runs = []
+            for _ in range(rng.randint(1, 4)):
+                tags = [f"\\pos({rng.randint(0, 1920)},{rng.randint(0, 1080)})",
+                        f"\\t({rng.randint(0, 500)},{rng.randint(500, 1000)},\\fscx{rng.randint(80, 120)})",
+                        f"\\move(0,0,{rng.randint(0, 100)},{rng.randint(0, 100)})"]
+                if rng.random() < 0.3:
+                    tags.append(f"\\fn{rng.choice(font_names)}")
+                if rng.random() < 0.1:
+                    runs.append("{\\p1}m 0 0 l 100 0 100 100 0 100{\\p0}")
+                text = random_cjk_text(rng, rng.randint(4, 20)) if rng.random() < 0.7 else f"Line {i} text"
+                runs.append("{" + "".join(rng.sample(tags, len(tags))) + "}" + text)
+            f.write(f"Dialogue: 0,0:00:{i % 60:02d}.00,0:00:{i % 60:02d}.50,{rng.choice(style_names)},,0,0,0,,"
+                    + "\\N".join(runs) + "\n")
+    return path
+
+def generate_font_dir(dest, source_fonts, copies):
+    # Copies of a few open-licensed fonts, each renamed to a unique family.
+    dest.mkdir(parents=True, exist_ok=True)
+    names = []
+    for i in range(copies):
+        src = source_fonts[i % len(source_fonts)]
+        family = f"Bench {Path(src).stem} {i:04d}"
+        tt = TTFont(src)
+        name_table = tt['name']
+        for record in list(name_table.names):
+            if record.nameID in (1, 4, 6, 16):
+                value = family.replace(" ", "") if record.nameID == 6 else family
+                name_table.setName(value, record.nameID, record.platformID, record.platEncID, record.langID)
+        tt.save(dest / f"bench_{i:04d}{Path(src).suffix.lower()}")
+        tt.close()
+        names.append(family)
+    return names
+
+def find_default_source_fonts(limit=3):
+    if sys.platform == "win32":
+        dirs = [os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts")]
+    elif sys.platform == "darwin":
+        dirs = ["/Library/Fonts", "/System/Library/Fonts"]
+    else:
+        dirs = ["/usr/share/fonts", os.path.expanduser("~/.local/share/fonts")]
+    found = []
+    for d in dirs:
+        for path in sorted(Path(d).rglob("*")) if Path(d).exists() else []:
+            if path.suffix.lower() in ('.ttf', '.otf') and any(h in path.name.lower() for h in DEFAULT_SOURCE_HINTS):
+                found.append(str(path))
+                if len(found) >= limit:
+                    return found
+    return found
+
+def write_stand_in_mkvmerge(bin_dir):
+    script = bin_dir / "mkvmerge_stand_in.py"
+    script.write_text(STAND_IN_MKVMERGE, encoding='utf-8')
+    if sys.platform == "win32":
+        wrapper = bin_dir / "mkvmerge.bat"
+        wrapper.write_text(f'@"{sys.executable}" "{script}" %*\n', encoding='utf-8')
+    else:
+        wrapper = bin_dir / "mkvmerge"
+        wrapper.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n', encoding='utf-8')
+        wrapper.chmod(0o755)
+    return str(wrapper)
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {"min": min(samples), "mean": statistics.mean(samples)}
+
+def run_benchmarks(args, work):
+    font_dir = work / "fonts"
+    episode_dir = work / "episode"
+    episode_dir.mkdir()
+    temp_dir = episode_dir / "temp_fonts_mux"
+    temp_dir.mkdir()
+
+    sources = args.source_font or find_default_source_fonts()
+    if not sources:
+        console.print("[bold red]Error: no source fonts found. Pass --source-font.[/]")
+        return None
+    with console.status("[bold green]Generating fixtures...", spinner="dots"):
+        font_names = generate_font_dir(font_dir, sources, args.fonts)
+        ass_path = generate_ass(episode_dir / "bench.ass", font_names, args.styles, args.lines, args.seed)
+        with open(episode_dir / "bench.mkv", 'wb') as f:
+            f.write(os.urandom(args.mkv_size * 1024 * 1024))
+
+    quiet = Console(file=open(os.devnull, 'w'))
+    real_console, mkvFontmux.console = mkvFontmux.console, quiet
+    results = {}
+    try:
+        index_path = work / "font_index.db"
+        results["scan_cold"] = timed(lambda: mkvFontmux.FontManager([str(font_dir)], cache_path=None), args.repeat)
+        fm = mkvFontmux.FontManager([str(font_dir)], cache_path=index_path)
+        results["scan_warm"] = timed(lambda: mkvFontmux.FontManager([str(font_dir)], cache_path=index_path), args.repeat)
+
+        parsed = {}
+        def parse():
+            parsed["fonts"] = mkvFontmux.collect_needed_fonts([ass_path])
+        results["ass_parse"] = timed(parse, args.repeat)
+
+        jobs = []
+        for font_name, chars in parsed["fonts"].items():
+            info = fm.find_font(font_name)
+            if info:
+                jobs.append((info[0], info[1], chars, temp_dir, mkvFontmux.generate_random_name()))
+        results["subset"] = timed(lambda: [mkvFontmux.subset_font_task(*job) for job in jobs], args.repeat)
+
+        font_name_map = {name: mkvFontmux.generate_random_name() for name in parsed["fonts"]}
+        results["rewrite"] = timed(lambda: mkvFontmux.rewrite_ass_files([ass_path], font_name_map, temp_dir), args.repeat)
+
+        mkvFontmux.MKVMERGE_BIN = write_stand_in_mkvmerge(work)
+        mux_args = mkvFontmux.build_arg_parser().parse_args([str(episode_dir), "--no-subset-cache"])
+        outcomes = []
+        results["end_to_end"] = timed(
+            lambda: outcomes.append(mkvFontmux.process_mkv(episode_dir / "bench.mkv", mux_args, fm, temp_dir)), args.repeat
+        )
+        failed = [outcome for outcome in outcomes if outcome is not True]
+        if failed:
+            console.print(f"[bold red]Error: end_to_end mux did not succeed (process_mkv returned {failed[0]}).[/]")
+            return None
+    finally:
+        mkvFontmux.console = real_console
+        quiet.file.close()
+    return results
+
+def print_results(results, baseline, threshold):
+    table = Table(title="mkvFontmux Benchmark", box=box.ROUNDED)
+    table.add_column("Stage", style="cyan")
+    table.add_column("Min (ms)", justify="right")
+    table.add_column("Mean (ms)", justify="right")
+    table.add_column("Baseline (ms)", justify="right", style="dim")
+    table.add_column("Change", justify="right")
+    regressions = []
+    for stage in STAGES:
+        result = results[stage]
+        base = baseline.get(stage) if baseline else None
+        change = "---"
+        if base:
+            ratio = result["min"] / base["min"]
+            color = "red" if ratio > 1 + threshold else "green" if ratio < 1 - threshold else "white"
+            change = f"[{color}]{(ratio - 1) * 100:+.1f}%[/]"
+            if ratio > 1 + threshold:
+                regressions.append(stage)
+        table.add_row(stage, f"{result['min'] * 1000:.1f}", f"{result['mean'] * 1000:.1f}",
+                      f"{base['min'] * 1000:.1f}" if base else "---", change)
+    console.print(table)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the mkvFontmux pipeline on synthetic fixtures")
+    parser.add_argument("--source-font", action="append", help="Open-licensed font to copy into the fixture library (repeatable)")
+    parser.add_argument("--fonts", type=int, default=20, help="Number of renamed font copies")
+    parser.add_argument("--styles", type=int, default=40, help="Number of ASS styles")
+    parser.add_argument("--lines", type=int, default=5000, help="Number of Dialogue lines")
+    parser.add_argument("--mkv-size", type=int, default=16, help="Size of the dummy MKV in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage (minimum is compared)")
+    parser.add_argument("--seed", type=int, default=0, help="Fixture random seed")
+    parser.add_argument("--save-baseline", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as a regression")
+    parser.add_argument("--keep", action="store_true", help="Keep the fixture directory")
+    args = parser.parse_args()
+
+    logging.getLogger("fontTools").setLevel(logging.ERROR)
+    params = {k: getattr(args, k) for k in ("fonts", "styles", "lines", "mkv_size", "seed")}
+    baseline = None
+    if args.compare:
+        data = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        if data.get("params") != params:
+            console.print(f"[yellow]Warning: baseline was recorded with {data.get('params')}[/]")
+        baseline = data.get("results")
+
+    work = Path(tempfile.mkdtemp(prefix="mkvfontmux_bench_"))
+    try:
+        results = run_benchmarks(args, work)
+    finally:
+        if args.keep:
+            console.print(f"[dim]Fixtures kept in {work}[/]")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+    if results is None:
+        sys.exit(2)
+
+    regressions = print_results(results, baseline, args.threshold)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps({"params": params, "results": results}, indent=2), encoding='utf-8')
+        console.print(f"[green][OK][/] Baseline saved: {args.save_baseline}")
+    if regressions:
+        console.print(f"[bold red]Regressions: {', '.join(regressions)}[/]")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -15,8 +15,18 @@ import argparse
 import logging
 import subprocess
 import re
+import json
+import mmap
+import struct
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from fontTools.ttLib import TTFont, TTCollection
+from fontTools.ttLib.tables._n_a_m_e import NameRecord
 from fontTools.subset import main as subset_main
 
 from rich.console import Console
@@ -29,20 +39,44 @@ MKVMERGE_BIN = "mkvmerge"
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 IGNORE_FONTS = {'default', 'arial', 'sans-serif'}
 SMART_SUFFIXES = ['_gbk', '_gb2312', '_big5', '_jis', '_kr']
+FONT_EXTENSIONS = {'.ttf', '.otf', '.ttc'}
+FONT_INDEX_VERSION = 3
+# Legacy Windows CJK name records, usually double-byte text padded into 16-bit units.
+LEGACY_NAME_CODECS = {2: 'cp932', 3: 'gbk', 4: 'cp950', 5: 'cp949', 6: 'johab'}
+LOOSE_KEY_RE = re.compile(r'[\s\-_\u2010\u2011\u2013\u2014\u30fb\u00b7]+')
+SUGGESTION_LIMIT = 3
+SUGGESTION_MIN_SCORE = 0.3
+GLYPH_REPORT_LIMIT = 20
+OVERWRITE_TEMP_SUFFIX = ".part"
+# Same order as fontTools getBestCmap.
+CMAP_PREFERENCE = [(3, 10), (0, 6), (0, 4), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0)]
+SFNT_VERSIONS = {b'\x00\x01\x00\x00', b'OTTO', b'true'}
 
 console = Console()
 file_logger = None
 
-def setup_file_logger(save_log_path):
+def setup_file_logger(save_log_path, mode='w'):
     global file_logger
     if save_log_path:
         file_logger = logging.getLogger("FileLogger")
         file_logger.setLevel(logging.INFO)
         file_logger.handlers.clear()
-        fh = logging.FileHandler(save_log_path, mode='w', encoding='utf-8')
+        if mode == 'w':
+            open(save_log_path, 'w').close()
+        # Append mode keeps lines from worker processes sharing this file intact.
+        fh = logging.FileHandler(save_log_path, mode='a', encoding='utf-8')
         fh.setFormatter(logging.Formatter(LOG_FORMAT))
         file_logger.addHandler(fh)
 
+def current_log_path():
+    if file_logger and file_logger.handlers:
+        return file_logger.handlers[0].baseFilename
+    return None
+
+def init_worker(save_log_path):
+    # Worker processes append to the parent's log instead of truncating it.
+    setup_file_logger(save_log_path, mode='a')
+
 def log_to_file(msg, level="info"):
     if file_logger:
         if level == "warning":
@@ -55,12 +89,425 @@ def log_to_file(msg, level="info"):
 def normalize_font_key(name):
     return name.lower().strip()
 
+def loose_font_key(name):
+    # Width-, case-, whitespace- and hyphen-insensitive form used for fallback matching.
+    return LOOSE_KEY_RE.sub('', unicodedata.normalize('NFKC', name).casefold())
+
+def name_trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def decode_name_record(record):
+    if record.platformID == 3 and record.platEncID in LEGACY_NAME_CODECS and isinstance(record.string, bytes):
+        return record.string.replace(b'\x00', b'').decode(LEGACY_NAME_CODECS[record.platEncID], errors='replace')
+    try:
+        return record.toUnicode()
+    except UnicodeDecodeError:
+        return record.toUnicode(errors='replace')
+
+def get_cache_dir():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(base) / "mkvFontmux"
+
+def read_sfnt_names(file_path):
+    # Reads name IDs 1/4/6 straight from the sfnt table directory.
+    # Returns None when the file needs the full fontTools reader.
+    try:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:4] == b'ttcf':
+                num_fonts = struct.unpack_from('>I', mm, 8)[0]
+                offsets = struct.unpack_from(f'>{num_fonts}I', mm, 12)
+            elif mm[:4] in SFNT_VERSIONS:
+                offsets = (0,)
+            else:
+                return None
+            records = []
+            for index, offset in enumerate(offsets):
+                if mm[offset:offset + 4] not in SFNT_VERSIONS:
+                    return None
+                num_tables = struct.unpack_from('>H', mm, offset + 4)[0]
+                name_table = None
+                for i in range(num_tables):
+                    tag, _, table_offset, table_length = struct.unpack_from('>4sLLL', mm, offset + 12 + i * 16)
+                    if tag == b'name':
+                        name_table = mm[table_offset:table_offset + table_length]
+                        break
+                if name_table is None:
+                    log_to_file(f"[Warning] Failed to register font: {file_path}", "warning")
+                    continue
+                _, count, string_offset = struct.unpack_from('>HHH', name_table, 0)
+                string_data = name_table[string_offset:]
+                for i in range(count):
+                    if 6 + (i + 1) * 12 > len(name_table):
+                        break
+                    platform_id, plat_enc_id, lang_id, name_id, length, str_offset = \
+                        struct.unpack_from('>6H', name_table, 6 + i * 12)
+                    if name_id not in (1, 4, 6) or str_offset + length > len(string_data):
+                        continue
+                    record = NameRecord()
+                    record.nameID, record.platformID = name_id, platform_id
+                    record.platEncID, record.langID = plat_enc_id, lang_id
+                    record.string = string_data[str_offset:str_offset + length]
+                    name = decode_name_record(record)
+                    if name:
+                        records.append((index, name))
+            return records
+    except (OSError, ValueError, struct.error):
+        return None
+
+def read_font_names(file_path):
+    records = read_sfnt_names(file_path)
+    if records is None:
+        log_to_file(f"[Font] Falling back to fontTools name reader: {file_path}")
+        records = read_font_names_fonttools(file_path)
+    return records
+
+def read_font_names_fonttools(file_path):
+    records = []
+    try:
+        if file_path.lower().endswith('.ttc'):
+            with TTCollection(file_path) as ttc:
+                face_count = len(ttc.fonts)
+        else:
+            face_count = 1
+    except Exception:
+        log_to_file(f"[Warning] Failed to read font file: {file_path}", "warning")
+        return records
+    for index in range(face_count):
+        try:
+            tt = TTFont(file_path, fontNumber=index, lazy=True)
+            for record in tt['name'].names:
+                if record.nameID in (1, 4, 6):
+                    name = decode_name_record(record)
+                    if name:
+                        records.append((index, name))
+            tt.close()
+        except Exception:
+            log_to_file(f"[Warning] Failed to register font: {file_path}", "warning")
+    return records
+
+def read_font_file(file_path):
+    return read_font_names(file_path), read_font_coverage(file_path)
+
+def read_font_files_batch(file_paths):
+    return [(file_path, read_font_file(file_path)) for file_path in file_paths]
+
+def read_sfnt_coverage(file_path):
+    # Unicode coverage per face from the best cmap subtable (format 4 or 12), as sorted
+    # [start, end) codepoint ranges. Returns None when the file needs the fontTools reader.
+    try:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:4] == b'ttcf':
+                num_fonts = struct.unpack_from('>I', mm, 8)[0]
+                offsets = struct.unpack_from(f'>{num_fonts}I', mm, 12)
+            elif mm[:4] in SFNT_VERSIONS:
+                offsets = (0,)
+            else:
+                return None
+            coverage = {}
+            for index, offset in enumerate(offsets):
+                num_tables = struct.unpack_from('>H', mm, offset + 4)[0]
+                cmap = None
+                for i in range(num_tables):
+                    tag, _, table_offset, _ = struct.unpack_from('>4sLLL', mm, offset + 12 + i * 16)
+                    if tag == b'cmap':
+                        cmap = table_offset
+                        break
+                if cmap is None:
+                    continue
+                subtables = {}
+                for i in range(struct.unpack_from('>H', mm, cmap + 2)[0]):
+                    platform_id, encoding_id, sub_offset = struct.unpack_from('>HHL', mm, cmap + 4 + i * 8)
+                    subtables.setdefault((platform_id, encoding_id), cmap + sub_offset)
+                for key in CMAP_PREFERENCE:
+                    if key in subtables:
+                        ranges = read_cmap_ranges(mm, subtables[key])
+                        if ranges is None:
+                            return None
+                        coverage[index] = ranges
+                        break
+            return coverage
+    except (OSError, ValueError, struct.error):
+        return None
+
+def read_cmap_ranges(mm, pos):
+    fmt = struct.unpack_from('>H', mm, pos)[0]
+    spans = []
+    if fmt == 4:
+        seg_count = struct.unpack_from('>H', mm, pos + 6)[0] // 2
+        ends = struct.unpack_from(f'>{seg_count}H', mm, pos + 14)
+        starts = struct.unpack_from(f'>{seg_count}H', mm, pos + 16 + seg_count * 2)
+        deltas = struct.unpack_from(f'>{seg_count}h', mm, pos + 16 + seg_count * 4)
+        range_offsets_pos = pos + 16 + seg_count * 6
+        range_offsets = struct.unpack_from(f'>{seg_count}H', mm, range_offsets_pos)
+        for i in range(seg_count):
+            start, end = starts[i], ends[i]
+            if start > end or start == 0xFFFF:
+                continue
+            if range_offsets[i] == 0:
+                # Only the codepoint whose delta wraps to glyph 0 is unmapped.
+                hole = (-deltas[i]) & 0xFFFF
+                if start <= hole <= end:
+                    spans.append((start, hole))
+                    spans.append((hole + 1, end + 1))
+                else:
+                    spans.append((start, end + 1))
+            else:
+                base = range_offsets_pos + i * 2 + range_offsets[i]
+                for c in range(start, end + 1):
+                    glyph = struct.unpack_from('>H', mm, base + (c - start) * 2)[0]
+                    if glyph:
+                        spans.append((c, c + 1))
+    elif fmt == 12:
+        num_groups = struct.unpack_from('>L', mm, pos + 12)[0]
+        for i in range(num_groups):
+            start, end, glyph = struct.unpack_from('>3L', mm, pos + 16 + i * 12)
+            if glyph == 0:
+                start += 1
+            if start <= end:
+                spans.append((start, end + 1))
+    else:
+        return None
+    spans.sort()
+    ranges = array('I')
+    for start, end in spans:
+        if start >= end:
+            continue
+        if ranges and start <= ranges[-1]:
+            ranges[-1] = max(ranges[-1], end)
+        else:
+            ranges.extend((start, end))
+    return ranges
+
+def read_font_coverage(file_path):
+    coverage = read_sfnt_coverage(file_path)
+    if coverage is None:
+        log_to_file(f"[Font] Falling back to fontTools cmap reader: {file_path}")
+        coverage = read_font_coverage_fonttools(file_path)
+    return coverage
+
+def read_font_coverage_fonttools(file_path):
+    coverage = {}
+    try:
+        if file_path.lower().endswith('.ttc'):
+            with TTCollection(file_path) as ttc:
+                face_count = len(ttc.fonts)
+        else:
+            face_count = 1
+        for index in range(face_count):
+            tt = TTFont(file_path, fontNumber=index, lazy=True)
+            cmap = tt.getBestCmap()
+            tt.close()
+            if cmap is not None:
+                coverage[index] = codepoint_ranges(cp for cp, glyph in cmap.items() if glyph != '.notdef')
+    except Exception:
+        log_to_file(f"[Warning] Failed to read cmap: {file_path}", "warning")
+    return coverage
+
+def codepoint_ranges(codepoints):
+    ranges = array('I')
+    for cp in sorted(codepoints):
+        if ranges and cp == ranges[-1]:
+            ranges[-1] = cp + 1
+        else:
+            ranges.extend((cp, cp + 1))
+    return ranges
+
+def text_codepoints(chars):
+    return sorted({ord(c) for c in chars if ord(c) >= 0x20})
+
+def missing_codepoints(ranges, codepoints):
+    # Merge walk of sorted codepoints against [start, end) ranges.
+    missing = []
+    i, n = 0, len(ranges)
+    for cp in codepoints:
+        while i < n and ranges[i + 1] <= cp:
+            i += 2
+        if i >= n or cp < ranges[i]:
+            missing.append(cp)
+    return missing
+
+def encode_coverage(coverage):
+    # Native-endian arrays; the index cache never leaves this machine.
+    return b"".join(struct.pack('<HI', index, len(ranges)) + ranges.tobytes() for index, ranges in coverage.items())
+
+def decode_coverage(blob):
+    coverage = {}
+    pos = 0
+    while pos < len(blob):
+        index, count = struct.unpack_from('<HI', blob, pos)
+        pos += 6
+        ranges = array('I')
+        ranges.frombytes(blob[pos:pos + count * ranges.itemsize])
+        pos += count * ranges.itemsize
+        coverage[index] = ranges
+    return coverage
+
+class FontIndexCache:
+    # Name records and cmap coverage per font file, keyed by absolute path and validated by size + mtime.
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != FONT_INDEX_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS fonts")
+            self.conn.execute(f"PRAGMA user_version = {FONT_INDEX_VERSION}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS fonts "
+            "(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, names TEXT, coverage BLOB)"
+        )
+
+    def load(self):
+        rows = self.conn.execute("SELECT path, size, mtime, names, coverage FROM fonts")
+        return {path: (size, mtime, json.loads(names), decode_coverage(coverage))
+                for path, size, mtime, names, coverage in rows}
+
+    def update(self, changed, deleted):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO fonts (path, size, mtime, names, coverage) VALUES (?, ?, ?, ?, ?)",
+                [(path, size, mtime, json.dumps(records, ensure_ascii=False), encode_coverage(coverage))
+                 for path, size, mtime, records, coverage in changed]
+            )
+            self.conn.executemany("DELETE FROM fonts WHERE path = ?", [(path,) for path in deleted])
+
+    def close(self):
+        self.conn.close()
+
+class PackedStrings:
+    # Append-only list of strings stored as one UTF-8 buffer plus offsets, instead of one
+    # str object per entry.
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, strings=()):
+        self.data = bytearray()
+        self.offsets = array('I', [0])
+        for text in strings:
+            self.append(text)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def append(self, text):
+        self.data += text.encode('utf-8')
+        self.offsets.append(len(self.data))
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].decode('utf-8')
+
+class FontNameIndex:
+    # Read-only {name key: row} built once a scan is complete. Keys are packed in order of
+    # their hash, so a lookup is a bisect over a flat array plus one key comparison.
+    __slots__ = ("hashes", "keys", "rows")
+
+    def __init__(self, mapping):
+        order = sorted(mapping, key=hash)
+        self.hashes = array('q', map(hash, order))
+        self.keys = PackedStrings(order)
+        self.rows = array('I', (mapping[key] for key in order))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return (self.keys[i] for i in range(len(self.keys)))
+
+    def _find(self, key):
+        h = hash(key)
+        i = bisect_left(self.hashes, h)
+        while i < len(self.hashes) and self.hashes[i] == h:
+            if self.keys[i] == key:
+                return i
+            i += 1
+        return None
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __getitem__(self, key):
+        i = self._find(key)
+        if i is None:
+            raise KeyError(key)
+        return self.rows[i]
+
+    def get(self, key, default=None):
+        i = self._find(key)
+        return default if i is None else self.rows[i]
+
+class FontRecordTable:
+    # One row per registered name. The name maps hold row numbers; paths are stored once per file
+    # and each file's rows are contiguous, so a face is (path, index, name) rebuilt on demand.
+    __slots__ = ("paths", "first_rows", "row_paths", "row_indexes", "names")
+
+    def __init__(self):
+        self.paths = []
+        self.first_rows = array('I')
+        self.row_paths = array('I')
+        self.row_indexes = array('H')
+        self.names = PackedStrings()
+
+    def __len__(self):
+        return len(self.names)
+
+    def add_file(self, path, records):
+        path_id = len(self.paths)
+        self.paths.append(path)
+        self.first_rows.append(len(self.names))
+        for index, name in records:
+            self.row_paths.append(path_id)
+            self.row_indexes.append(index)
+            self.names.append(name)
+        return path_id
+
+    def file_rows(self, path_id):
+        end = self.first_rows[path_id + 1] if path_id + 1 < len(self.paths) else len(self.names)
+        return range(self.first_rows[path_id], end)
+
+    def records(self, path_id):
+        return [(self.row_indexes[row], self.names[row]) for row in self.file_rows(path_id)]
+
+    def path(self, row):
+        return self.paths[self.row_paths[row]]
+
+    def face(self, row):
+        return self.path(row), self.row_indexes[row], self.names[row]
+
+def pack_coverage(coverage):
+    # {face index: ranges} -> tuple indexed by face index, None where a face has no Unicode cmap.
+    if not coverage:
+        return ()
+    return tuple(coverage.get(index) for index in range(max(coverage) + 1))
+
+def unpack_coverage(packed):
+    return {index: ranges for index, ranges in enumerate(packed) if ranges is not None}
+
 class FontManager:
-    def __init__(self, search_dirs=None, smart_match=True):
+    def __init__(self, search_dirs=None, smart_match=True, cache_path=None, scan_jobs=1):
         self.font_map = {}
+        self.loose_map = {}
+        self.alternates = {}
+        self.faces = FontRecordTable()
+        self._files = {}
+        self._trigram_index = None
         self.smart_match = smart_match
+        self.scan_jobs = max(1, scan_jobs)
+        self.index_cache = self._open_index_cache(cache_path)
         self._scan_dirs(search_dirs)
 
+    def _open_index_cache(self, cache_path):
+        if not cache_path:
+            return None
+        try:
+            return FontIndexCache(cache_path)
+        except (sqlite3.Error, OSError) as e:
+            log_to_file(f"[Warning] Font index cache unavailable: {cache_path} ({e})", "warning")
+            return None
+
     def _get_system_font_dirs(self):
         if sys.platform == "win32":
             dirs = [os.path.join(os.environ["WINDIR"], "Fonts")]
@@ -73,90 +520,263 @@ class FontManager:
         else:
             return ["/usr/share/fonts", os.path.expanduser("~/.local/share/fonts")]
 
+    def _iter_font_files(self, roots):
+        for root in roots:
+            stack = [root]
+            while stack:
+                directory = stack.pop()
+                try:
+                    with os.scandir(directory) as it:
+                        entries = list(it)
+                except OSError as e:
+                    log_to_file(f"[Warning] Failed to list font directory: {directory} ({e})", "warning")
+                    continue
+                # Errors are per entry, so one broken file or link does not hide its siblings.
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        if os.path.splitext(entry.name)[1].lower() not in FONT_EXTENSIONS:
+                            continue
+                        st = entry.stat()
+                    except OSError as e:
+                        log_to_file(f"[Warning] Failed to read font file: {entry.path} ({e})", "warning")
+                        continue
+                    yield entry.path, st.st_size, st.st_mtime_ns
+
     def _scan_dirs(self, custom_dirs):
         target_dirs = custom_dirs if custom_dirs else self._get_system_font_dirs()
         log_to_file(f"[System] Start scanning font directories: {target_dirs}")
-        
+        roots = [str(Path(d).resolve()) for d in target_dirs if Path(d).exists()]
+
+        cached = {}
+        if self.index_cache:
+            try:
+                cached = self.index_cache.load()
+            except sqlite3.Error as e:
+                log_to_file(f"[Warning] Failed to load font index cache: {e}", "warning")
+        files = list(self._iter_font_files(roots))
+        seen = {file_path for file_path, _, _ in files}
+        changed = []
+        for file_path, size, mtime in files:
+            entry = cached.get(file_path)
+            if not entry or entry[0] != size or entry[1] != mtime:
+                changed.append((file_path, size, mtime))
+
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             transient=True 
         ) as progress:
             task = progress.add_task(f"[cyan]Scanning fonts...", total=None)
-            for d in target_dirs:
-                p = Path(d)
-                if not p.exists(): continue
-                for file_path in p.rglob("*"):
-                    if file_path.suffix.lower() in ['.ttf', '.otf', '.ttc']:
-                        self._process_font_file(file_path)
-                        progress.update(task, description=f"[cyan]Fonts indexed: {len(self.font_map)} names...")
-            
+            fresh = self._read_changed_fonts([c[0] for c in changed], progress, task)
+            changed = [(file_path, size, mtime, *fresh[file_path]) for file_path, size, mtime in changed]
+
+            # Register in walk order so duplicate names resolve exactly as in a serial scan.
+            for file_path, size, mtime in files:
+                records, coverage = fresh[file_path] if file_path in fresh else cached[file_path][2:]
+                path_id = self._register_names(file_path, records)
+                self._files[file_path] = (size, mtime, path_id, pack_coverage(coverage))
+            # The dicts are only needed while registering; lookups use the compact form.
+            self.font_map = FontNameIndex(self.font_map)
+            self.loose_map = FontNameIndex(self.loose_map)
+
+            if self.index_cache:
+                deleted = [
+                    path for path in cached
+                    if path not in seen and any(path.startswith(os.path.join(r, "")) for r in roots)
+                ]
+                try:
+                    self.index_cache.update(changed, deleted)
+                except sqlite3.Error as e:
+                    log_to_file(f"[Warning] Failed to update font index cache: {e}", "warning")
+                log_to_file(
+                    f"[System] Font index cache: {len(seen) - len(changed)} reused, "
+                    f"{len(changed)} rescanned, {len(deleted)} removed."
+                )
+
             log_to_file(f"[System] Scan complete. Indexed {len(self.font_map)} font names.")
             console.print(f"[green][OK][/] Font index built: [bold cyan]{len(self.font_map)}[/] names.")
 
-    def _process_font_file(self, file_path):
-        try:
-            abs_path = str(file_path.resolve())
-            if file_path.suffix.lower() == '.ttc':
-                with TTCollection(file_path) as ttc:
-                    for i, _ in enumerate(ttc.fonts):
-                        self._register_font(abs_path, i)
-            else:
-                self._register_font(abs_path, 0)
-        except Exception:
-            log_to_file(f"[Warning] Failed to read font file: {file_path}", "warning")
-
-    def _register_font(self, file_path, index):
-        try:
-            tt = TTFont(file_path, fontNumber=index, lazy=True)
-            for record in tt['name'].names:
-                if record.nameID in (1, 4, 6): 
-                    name = record.toUnicode()
-                    if name:
-                        key = normalize_font_key(name)
-                        self.font_map[key] = (file_path, index, name)
-                        self.font_map[key.replace(" ", "")] = (file_path, index, name)
-            tt.close()
-        except Exception:
-            log_to_file(f"[Warning] Failed to register font: {file_path}", "warning")
-
-    def find_font(self, ass_name):
+    def _read_changed_fonts(self, file_paths, progress, task):
+        fresh = {}
+        if self.scan_jobs > 1 and len(file_paths) > self.scan_jobs:
+            chunk_size = max(1, min(64, len(file_paths) // (self.scan_jobs * 4)))
+            chunks = [file_paths[i:i + chunk_size] for i in range(0, len(file_paths), chunk_size)]
+            log_to_file(f"[System] Reading {len(file_paths)} font files with {self.scan_jobs} workers.")
+            with ProcessPoolExecutor(self.scan_jobs, initializer=init_worker, initargs=(current_log_path(),)) as pool:
+                for batch in pool.map(read_font_files_batch, chunks):
+                    fresh.update(batch)
+                    progress.update(task, description=f"[cyan]Font files read: {len(fresh)}/{len(file_paths)}...")
+        else:
+            for file_path in file_paths:
+                fresh[file_path] = read_font_file(file_path)
+                progress.update(task, description=f"[cyan]Font files read: {len(fresh)}/{len(file_paths)}...")
+        return fresh
+
+    def _register_names(self, file_path, records):
+        path_id = self.faces.add_file(file_path, records)
+        for row in self.faces.file_rows(path_id):
+            name = self.faces.names[row]
+            key = normalize_font_key(name)
+            previous = self.font_map.get(key)
+            if previous is not None and self.faces.row_paths[previous] != path_id:
+                # Other files with the same name stay available for coverage-based selection.
+                self.alternates.setdefault(key, [previous]).append(row)
+            self.font_map[key] = row
+            self.font_map[key.replace(" ", "")] = row
+            self.loose_map[loose_font_key(name)] = row
+        return path_id
+
+    def find_font(self, ass_name, chars=None):
+        row = self._lookup_font(ass_name)
+        if row is None:
+            return None
+        key = normalize_font_key(self.faces.names[row])
+        if chars and key in self.alternates:
+            # Only copies of the same face compete (same name set), so a Bold face never
+            # replaces a Regular one. Fewest missing glyphs first, then the smallest file.
+            names = self._face_names(row)
+            candidates = [alt for alt in self.alternates[key] if self._face_names(alt) == names]
+            codepoints = text_codepoints(chars)
+            row = min(candidates, key=lambda alt: self._coverage_rank(alt, codepoints))
+        return self.faces.face(row)
+
+    def _face_names(self, row):
+        faces = self.faces
+        index = faces.row_indexes[row]
+        return {normalize_font_key(faces.names[r]) for r in faces.file_rows(faces.row_paths[row]) if faces.row_indexes[r] == index}
+
+    def _coverage_rank(self, row, codepoints):
+        size, _, _, coverage = self._files[self.faces.path(row)]
+        return len(self._missing(coverage, self.faces.row_indexes[row], codepoints)), size
+
+    def missing_glyphs(self, info, chars):
+        coverage = self._files[info[0]][3]
+        return "".join(chr(cp) for cp in self._missing(coverage, info[1], text_codepoints(chars)))
+
+    def _missing(self, coverage, index, codepoints):
+        ranges = coverage[index] if index < len(coverage) else None
+        # Faces without a Unicode cmap are not judged.
+        return missing_codepoints(ranges, codepoints) if ranges is not None else []
+
+    def _lookup_font(self, ass_name):
         target = normalize_font_key(ass_name)
         if target in self.font_map: return self.font_map[target]
         if self.smart_match:
+            candidates = [target]
             for s in SMART_SUFFIXES:
                 if target.endswith(s):
                     clean = target.replace(s, "")
                     if clean in self.font_map: return self.font_map[clean]
+                    candidates.append(clean)
+            for candidate in candidates:
+                loose = loose_font_key(candidate)
+                if loose in self.loose_map: return self.loose_map[loose]
         return None
 
+    def suggest_fonts(self, ass_name, limit=SUGGESTION_LIMIT):
+        # Closest library names by trigram overlap (Dice coefficient).
+        if self._trigram_index is None:
+            self._trigram_index = {}
+            for key in self.loose_map:
+                for gram in name_trigrams(key):
+                    self._trigram_index.setdefault(gram, []).append(key)
+        query = name_trigrams(loose_font_key(ass_name))
+        overlap = Counter()
+        for gram in query:
+            overlap.update(self._trigram_index.get(gram, ()))
+        scored = []
+        for key, common in overlap.items():
+            score = 2 * common / (len(query) + len(name_trigrams(key)))
+            if score >= SUGGESTION_MIN_SCORE:
+                scored.append((score, key))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self.faces.face(self.loose_map[key]) for _, key in scored[:limit]]
+
 class AssParser:
     def __init__(self, filepath):
         self.text_by_font = {}
         self._parse(filepath)
 
     def _parse(self, filepath):
-        with open(filepath, 'r', encoding='utf-8-sig', errors='ignore') as f:
-            lines = f.readlines()
+        # Single streaming pass. Characters are collected per style name and resolved
+        # to fonts at the end, so styles defined after the events still apply.
         styles = {}
+        chars_by_style = {}
+        chars_by_font = {}
         section = None
-        for line in lines:
-            line = line.strip()
-            if line.startswith('['):
-                section = line
-                continue
-            if section == '[V4+ Styles]' and line.startswith('Style:'):
-                parts = line.split(',')
-                if len(parts) > 2:
-                    styles[parts[0].replace('Style:', '').strip()] = parts[1].strip()
-        for line in lines:
-            if line.startswith('Dialogue:'):
-                parts = line.split(',', 9)
-                if len(parts) >= 10:
-                    style_name = parts[3].strip()
-                    font = styles.get(style_name, 'Default')
-                    text = re.sub(r'\{.*?\}|\\N|\\n', '', parts[9].strip())
-                    self.text_by_font.setdefault(font, set()).update(text)
+        with open(filepath, 'r', encoding='utf-8-sig', errors='ignore') as f:
+            for raw in f:
+                if raw.startswith('Dialogue:'):
+                    parts = raw.split(',', 9)
+                    if len(parts) >= 10:
+                        self._credit_text(parts[9].strip(), parts[3].strip(), chars_by_style, chars_by_font)
+                    continue
+                line = raw.strip()
+                if line.startswith('['):
+                    section = line
+                elif section == '[V4+ Styles]' and line.startswith('Style:'):
+                    parts = line.split(',')
+                    if len(parts) > 2:
+                        styles[parts[0].replace('Style:', '').strip()] = parts[1].strip()
+        for (style_name, line_style), chars in chars_by_style.items():
+            if style_name in styles:
+                font = styles[style_name]
+            else:
+                font = styles.get(line_style, 'Default')
+            self.text_by_font.setdefault(font, set()).update(chars)
+        for font, chars in chars_by_font.items():
+            self.text_by_font.setdefault(font, set()).update(chars)
+
+    def _credit_text(self, text, line_style, chars_by_style, chars_by_font):
+        # Walks override blocks the way libass does: \fn switches the font, \r resets to
+        # the line style (or a named style, if it exists), and \p<n> drawings render no glyphs.
+        style = line_style
+        font = None
+        drawing = False
+        pos = 0
+        while pos < len(text):
+            start = text.find('{', pos)
+            end = text.find('}', start) if start >= 0 else -1
+            run = text[pos:start] if end >= 0 else text[pos:]
+            if run and not drawing:
+                run = run.replace('\\N', '').replace('\\n', '').replace('\\h', '\u00a0')
+                if font is None:
+                    chars_by_style.setdefault((style, line_style), set()).update(run)
+                else:
+                    chars_by_font.setdefault(font, set()).update(run)
+            if end < 0:
+                break
+            for tag in text[start + 1:end].split('\\')[1:]:
+                if tag.startswith('fn'):
+                    name = tag[2:].strip()
+                    font = name if name and name != '0' else None
+                elif tag.startswith('r'):
+                    style = tag[1:].strip() or line_style
+                    font = None
+                    drawing = False
+                elif tag.startswith('p') and tag[1:].strip().isdigit():
+                    drawing = int(tag[1:]) > 0
+            pos = end + 1
+
+def overwrite_temp_path(mkv_path):
+    # Hidden sibling on the same filesystem as the source, so replacing it is a rename, never a copy.
+    return mkv_path.with_name(f".{mkv_path.name}{OVERWRITE_TEMP_SUFFIX}")
+
+def fsync_file(path):
+    with open(path, 'rb+') as f:
+        os.fsync(f.fileno())
+
+def fsync_dir(path):
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 def subset_font_task(font_path, font_index, text, output_dir, disable_subset=False):
     name = Path(font_path).stem
@@ -222,25 +842,37 @@ def process_mkv(mkv_path, args, font_manager, temp_dir):
     valid_fonts = [] 
 
     for font_name, chars in needed_fonts.items():
-        info = font_manager.find_font(font_name)
+        info = font_manager.find_font(font_name, chars)
         char_count = len(chars)
         
         if info:
             file_path, font_index, real_name = info
             log_to_file(f"[Match] OK: ASS='{font_name}' -> File='{file_path}'")
+            source_text = f"{real_name}\n({Path(file_path).name})"
+            missing_glyphs = font_manager.missing_glyphs(info, chars)
+            if missing_glyphs:
+                log_to_file(f"[Match] '{font_name}' lacks {len(missing_glyphs)} glyphs: {missing_glyphs}", "warning")
+                more = "..." if len(missing_glyphs) > GLYPH_REPORT_LIMIT else ""
+                source_text += f"\nMissing: {missing_glyphs[:GLYPH_REPORT_LIMIT]}{more}"
             table.add_row(
                 font_name, 
-                "[green]OK[/]", 
-                f"{real_name}\n({Path(file_path).name})", 
+                "[yellow]Partial[/]" if missing_glyphs else "[green]OK[/]", 
+                source_text, 
                 str(char_count)
             )
             valid_fonts.append((font_name, info, chars))
         else:
             log_to_file(f"[Match] Missing in system: '{font_name}'", "warning")
+            suggestions = font_manager.suggest_fonts(font_name)
+            if suggestions:
+                log_to_file(f"[Match] Closest library fonts for '{font_name}': {[s[2] for s in suggestions]}")
+                source = "Did you mean:\n" + "\n".join(f"{name} ({Path(path).name})" for path, _, name in suggestions)
+            else:
+                source = "---"
             table.add_row(
                 font_name, 
                 "[bold red]Missing[/]", 
-                "---", 
+                source, 
                 str(char_count)
             )
 
@@ -277,7 +909,7 @@ def process_mkv(mkv_path, args, font_manager, temp_dir):
             progress.advance(task)
 
     if args.overwrite:
-        out_file = temp_dir / f"temp_{mkv_path.name}"
+        out_file = overwrite_temp_path(mkv_path)
     else:
         out_dir = mkv_path.parent / "output"
         out_dir.mkdir(exist_ok=True)
@@ -296,7 +928,9 @@ def process_mkv(mkv_path, args, font_manager, temp_dir):
             subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
             log_to_file(f"[Mux] Completed successfully.")
             if args.overwrite:
-                shutil.move(str(out_file), str(mkv_path))
+                fsync_file(out_file)
+                os.replace(out_file, mkv_path)
+                fsync_dir(mkv_path.parent)
                 console.print(f"[bold green]OK: Overwrote {mkv_path.name}[/]")
             else:
                 console.print(f"[bold green]OK: Created output/{mkv_path.name}[/]")
@@ -304,12 +938,23 @@ def process_mkv(mkv_path, args, font_manager, temp_dir):
             console.print(f"[bold red]Mux failed.[/]")
             console.print(Panel(e.stderr.decode(), title="Error details", border_style="red"))
             log_to_file(f"[Error] Mux failed: {e.stderr.decode()}", "error")
+            if args.overwrite:
+                out_file.unlink(missing_ok=True)
+        except OSError as e:
+            # e.g. the target is locked on Windows; the source stays as it was.
+            console.print(f"[bold red]Overwrite failed: {mkv_path.name} ({e})[/]")
+            log_to_file(f"[Error] Overwrite failed: {mkv_path} ({e})", "error")
+            if args.overwrite:
+                out_file.unlink(missing_ok=True)
 
 def main():
     parser = argparse.ArgumentParser(description="MKV font subset + mux tool")
     parser.add_argument("dir", help="Directory containing videos and subtitles")
     parser.add_argument("--force-match", action="store_true", help="Force exact font name matching")
     parser.add_argument("--font-directory", help="Custom font scan directory")
+    parser.add_argument("--font-cache", help="Font index cache file (default: user cache directory)")
+    parser.add_argument("--no-font-cache", action="store_true", help="Rescan all fonts without the index cache")
+    parser.add_argument("--scan-jobs", type=int, default=1, help="Worker processes for reading font files")
     parser.add_argument("--disable-subset", action="store_true", help="Disable font subsetting")
     parser.add_argument("--save-log", action="store_true", help="Save log to mux.log")
     parser.add_argument("--overwrite", action="store_true", help="Overwrite source MKV")
@@ -341,7 +986,12 @@ def main():
     console.print(Panel.fit(f"[bold white]MKV Font Mux Tool[/]\n[dim]Directory: {work_dir}[/]\n{title_mode}", style="blue"))
 
     font_dirs = [args.font_directory] if args.font_directory else None
-    fm = FontManager(search_dirs=font_dirs, smart_match=not args.force_match)
+    if args.no_font_cache:
+        font_cache = None
+    else:
+        font_cache = Path(args.font_cache) if args.font_cache else get_cache_dir() / "font_index.db"
+    fm = FontManager(search_dirs=font_dirs, smart_match=not args.force_match, cache_path=font_cache,
+                     scan_jobs=args.scan_jobs)
 
     temp_dir = work_dir / "temp_fonts_mux"
     temp_dir.mkdir(exist_ok=True)